@@ -0,0 +1,348 @@
+#########################################################################################################
+#                                                                                                       #
+#  Weatherbench: benchmarks for Weatherinfo (openATV), runs offline                                     #
+#  Coded by Mr.Servo @ openATV and jbleyel @ openATV (c) 2022                                           #
+#  Usage: "python -m Weatherbench [scenario...]" (runs all scenarios if none is given)                  #
+#  Recorded provider answers in 'fixtures/<route>.json' replace the built-in payloads (not for stress)  #
+#  (recorded online by "python -m Weatherbench record [owm-apikey]")                                    #
+#  -----------------------------------------------------------------------------------------------------#
+#  This plugin is licensed under the GNU version 3.0 <https://www.gnu.org/licenses/gpl-3.0.en.html>.    #
+#  This plugin is NOT free software. It is open source, you are allowed to modify it (if you keep       #
+#  the license), but it may not be commercially distributed. Advertise with this tool is not allowed.   #
+#  For other uses, permission from the authors is necessary.                                            #
+#                                                                                                       #
+#########################################################################################################
+
+from sys import argv, executable, exit
+from os import close, makedirs, remove
+from os.path import abspath, dirname, isfile, join
+from json import dumps, loads
+from io import StringIO
+from contextlib import redirect_stdout
+from statistics import median, quantiles
+from subprocess import DEVNULL, run
+from threading import Thread
+from tempfile import mkstemp
+from time import perf_counter
+from timeit import repeat as timeitrepeat
+from tracemalloc import get_traced_memory, start as tracestart, stop as tracestop
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+HERE = dirname(abspath(__file__))
+FIXTURES = join(HERE, "fixtures")
+
+
+def msnpayload(query):  # MSN weather overview with the fields read by 'Weatherinfo.msncontext' and some ballast
+	lon, lat = float(query["lon"][0]), float(query["lat"][0])
+	today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+	days = []
+	for idx in range(10):
+		day = today + timedelta(days=idx)
+		days.append({"almanac": {"sunrise": day.replace(hour=6, minute=3).isoformat() + "+01:00", "sunset": day.replace(hour=18, minute=44).isoformat() + "+01:00",
+								"moonrise": day.replace(hour=5).isoformat() + "+01:00", "moonset": day.replace(hour=15).isoformat() + "+01:00"},
+					"hourly": [{"symbol": "d%s00" % (hour % 5), "pvdrCap": "Hour %s" % hour, "temp": 5 + hour % 7, "rh": 70, "windSpd": 12, "baro": 1012} for hour in range(24)] if idx < 9 else [],
+					"daily": {"symbol": ("d000", "d100", "n210", "d4101", "d300", "d600", "d240")[idx % 7], "baro": 1010.4 + idx, "tempLo": 1.2 + idx, "tempHi": 10.6 + idx, "feelsHi": 9.1 + idx,
+							"feelsLo": -1.4 + idx, "windMax": 20.5, "windMaxDir": 45 * idx % 360, "windTh": 33.3, "uv": 3.2, "vis": 10.0, "pvdrCap": "Partly sunny",
+							"day": {"precip": 10 * idx, "summaries": [" Partly sunny. ", " Highs %s°. " % (10 + idx)]}, "night": {"summaries": [" Clear. ", " Lows %s°. " % idx]}}})
+	return {"units": {"pressure": "mb", "temperature": "\u200e°C", "speed": "km/h", "distance": "km"},
+			"responses": [{"source": {"coordinates": {"lon": lon, "lat": lat}},
+						"weather": [{"current": {"created": datetime.now().replace(microsecond=0).isoformat() + "+01:00", "symbol": "d300", "baro": 1012.3, "temp": 8.6, "feels": 6.4, "rh": 71,
+												"windSpd": 14.2, "windDir": 250, "windGust": 30.1, "uv": 2.4, "vis": 16.1, "capAbbr": "Cloudy"},
+									"forecast": {"days": days}, "nowcasting": {"shortSummary": "No rain expected", "precipitation": [0.0] * 120},
+									"lifeDaily": {"days": [{"umbrellaIndex": {"summary": "No umbrella", "longSummary2": "You will not need an umbrella"}}]}}]}]}
+
+
+def omwpayload(query):  # Open-Meteo forecast in the layout requested by 'Weatherinfo.omwparams', a list for several coordinates
+	lons, lats = query["longitude"][0].split(","), query["latitude"][0].split(",")
+	if len(lons) > 1:
+		return [omwpayload(dict(query, longitude=[lon], latitude=[lat])) for lon, lat in zip(lons, lats)]
+	lon, lat = float(lons[0]), float(lats[0])
+	today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+	hours = [(today + timedelta(hours=hour)) for hour in range(168)]
+	days = [(today + timedelta(days=day)).strftime("%Y-%m-%d") for day in range(7)]
+	hourly = {"time": [hour.strftime("%Y-%m-%dT%H:%M") for hour in hours]}
+	for idx, name in enumerate(query["hourly"][0].split(",")):
+		hourly[name] = [round(idx * 10 + hour.hour / 3, 1) for hour in hours]
+	hourly["weathercode"] = [(0, 1, 2, 3, 45, 61, 95)[hour.hour % 7] for hour in hours]
+	hourly["visibility"] = [20000.0 + hour.hour * 100 for hour in hours]
+	daily = {"time": days, "sunrise": ["%sT06:30" % day for day in days], "sunset": ["%sT18:30" % day for day in days]}
+	for idx, name in enumerate(query["daily"][0].split(",")):
+		daily.setdefault(name, [round(idx + day / 2, 1) for day in range(7)])
+	daily["weathercode"] = [(0, 1, 3, 61, 71, 95, 2)[day] for day in range(7)]
+	offset = int(datetime.now().astimezone().utcoffset().total_seconds())  # the stub serves the local time of this machine
+	return {"latitude": lat, "longitude": lon, "timezone": "Europe/Berlin", "utc_offset_seconds": offset, "current": {"time": datetime.now().strftime("%Y-%m-%dT%H:%M"), "pressure_msl": 1013.2},
+			"hourly_units": {"temperature_2m": "°C", "windspeed_10m": "km/h", "precipitation_probability": "%", "uv_index": ""}, "hourly": hourly, "daily": daily}
+
+
+def owmweather(query):  # OpenWeatherMap current weather
+	lon, lat = float(query["lon"][0]), float(query["lat"][0])
+	return {"coord": {"lon": lon, "lat": lat}, "weather": [{"id": 803, "description": "broken clouds"}], "visibility": 10000, "wind": {"speed": 4.1, "deg": 240},
+			"main": {"temp": 8.4, "feels_like": 6.1, "pressure": 1012, "humidity": 70, "temp_min": 7.0, "temp_max": 9.9}, "dt": int(datetime.now().timestamp()), "name": "Berlin"}
+
+
+def owmforecast(query):  # OpenWeatherMap 5 day / 3 hour forecast
+	lon, lat = float(query["lon"][0]), float(query["lat"][0])
+	today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+	slots = [today + timedelta(hours=3 * idx) for idx in range(datetime.now().hour // 3 + 1, datetime.now().hour // 3 + 41)]
+	return {"list": [{"dt": int(slot.timestamp()), "dt_txt": slot.strftime("%Y-%m-%d %H:%M:%S"), "visibility": 10000, "pop": idx % 10 / 10,
+					"main": {"temp": 5 + idx % 8, "feels_like": 3 + idx % 8, "temp_min": 4 + idx % 8, "temp_max": 6 + idx % 8, "pressure": 1005 + idx % 11, "humidity": 70},
+					"weather": [{"id": (800, 801, 500, 600, 211)[idx % 5], "description": "clouds"}], "wind": {"speed": 3.1, "deg": idx * 40 % 360, "gust": 7.7}} for idx, slot in enumerate(slots)],
+			"city": {"coord": {"lat": lat, "lon": lon}, "sunrise": int(today.replace(hour=6).timestamp()), "sunset": int(today.replace(hour=18).timestamp())}}
+
+
+def omwgeocoding(query):  # Open-Meteo geocoding search
+	name = query["name"][0].split(",")[0]
+	return {"results": [{"name": "%s%s" % (name, suffix), "latitude": 52.52 + idx / 100, "longitude": 13.41 + idx / 100, "country": "Deutschland", "country_code": "DE", "admin1": "Land Berlin"}
+						for idx, suffix in enumerate(("", " Mitte", " Spandau", " Pankow"))]}
+
+
+def owmgeocoding(query):  # OpenWeatherMap direct geocoding
+	name = query["q"][0].split(",")[0]
+	return [{"name": name, "lat": 52.52, "lon": 13.405, "country": "DE", "state": "Berlin", "local_names": {"de": name}}]
+
+
+class StubHandler(BaseHTTPRequestHandler):  # answers like the provider APIs, selected by the path of the request
+	protocol_version = "HTTP/1.1"
+	disable_nagle_algorithm = True  # headers and body are sent separately, do not wait for the delayed ACK of the client
+	ROUTES = {"/weatherfalcon/weather/overview": msnpayload, "/v1/forecast": omwpayload, "/v1/search": omwgeocoding,
+			"/data/2.5/weather": owmweather, "/data/2.5/forecast": owmforecast, "/geo/1.0/direct": owmgeocoding}
+	recorded = {}  # route: bytes of 'fixtures/<route>.json', recorded answers of the real providers
+
+	@classmethod
+	def replay(cls, path):
+		if path not in cls.recorded:
+			filename = join(FIXTURES, "%s.json" % path.strip("/").replace("/", "_"))
+			cls.recorded[path] = open(filename, "rb").read() if isfile(filename) else None
+		return cls.recorded[path]
+
+	def log_message(self, format, *args):
+		pass
+
+	def do_GET(self):
+		parts = urlsplit(self.path)
+		route = self.ROUTES.get(parts.path)
+		query = parse_qs(parts.query)
+		recorded = self.replay(parts.path) if self.server.replay and "," not in "".join(query.get("longitude", [])) else None  # a recording is one location, batches are built
+		body = (recorded or dumps(route(query)).encode("utf-8")) if route else b"{}"
+		self.server.hits += 1
+		self.send_response(200 if route else 404)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):  # local stand-in for MSN, Open-Meteo and OpenWeatherMap
+	daemon_threads = True
+	request_queue_size = 256
+
+	def __init__(self, replay=True):  # replay = answer with recorded fixtures if there are any (they are the same for every location)
+		ThreadingHTTPServer.__init__(self, ("127.0.0.1", 0), StubHandler)
+		self.replay = replay
+		self.hits = 0
+		Thread(target=self.serve_forever, daemon=True).start()
+
+	def session(self):  # WIsession sending all requests to this server instead of the internet
+		from requests.adapters import HTTPAdapter
+		from Weatherinfo import WIsession
+		port = self.server_address[1]
+
+		class StubAdapter(HTTPAdapter):
+			def send(self, request, **kwargs):
+				parts = urlsplit(request.url)
+				request.url = "http://127.0.0.1:%s%s?%s" % (port, parts.path, parts.query)
+				return HTTPAdapter.send(self, request, **kwargs)
+
+		session = WIsession()
+		adapter = StubAdapter(pool_connections=4, pool_maxsize=64)
+		session.session.mount("https://", adapter)
+		session.session.mount("http://", adapter)
+		return session
+
+
+def timeprocess(args, repeat):
+	times = []
+	for idx in range(repeat):
+		start = perf_counter()
+		run([executable] + args, cwd=HERE, stdout=DEVNULL, stderr=DEVNULL, check=False)
+		times.append(perf_counter() - start)
+	return median(times)
+
+
+def benchimports(repeat=10):  # startup costs of library import and CLI, measured in fresh interpreters
+	print("\n[imports] median of %s runs, interpreter startup subtracted" % repeat)
+	interpreter = timeprocess(["-c", "pass"], repeat)
+	rows = [("import Weatherinfo", ["-c", "import Weatherinfo"]),
+			("python Weatherinfo.py -c", ["Weatherinfo.py", "-c"]),
+			("import requests (reference)", ["-c", "import requests"]),
+			("import twisted reactor (reference)", ["-c", "import twisted.internet.reactor"])
+			]
+	for text, args in rows:
+		print("{0:<36}{1:>9.1f} ms".format(text, (timeprocess(args, repeat) - interpreter) * 1000))
+	result = run([executable, "-c", "import sys, Weatherinfo; print(', '.join(m for m in ('twisted', 'requests', 'asyncio', 'ssl') if m in sys.modules) or 'none')"], cwd=HERE, capture_output=True, text=True, check=False)
+	print("{0:<36}{1}".format("heavy modules after import", result.stdout.strip() or result.stderr.strip()))
+
+
+def benchstress(threads=16, calls=25):  # one shared Weatherinfo instance hammered by many threads, every result must belong to its own call
+	from Weatherinfo import Weatherinfo, WIrequest
+	print("\n[stress] %s threads x %s calls on one instance against the local stub server" % (threads, calls))
+	server = StubServer(replay=False)  # every result is checked against the location of its call, recorded fixtures have one location only
+	WI = Weatherinfo("omw", session=server.session())
+	failures = []
+
+	def check(geodata, reduced, error):
+		if error or not reduced or reduced["name"] != geodata[0].split(", ")[0] or float(reduced["longitude"]) != geodata[1] or float(reduced["latitude"]) != geodata[2]:
+			failures.append((geodata, reduced.get("name") if reduced else error))
+
+	def worker(thread):
+		for call in range(calls):
+			geodata = ("T%sC%s, DE" % (thread, call), round(10 + thread / 100, 4), round(50 + call / 100, 4))
+			if call % 2:  # the same way as 'start(..., callback=...)' runs the parser in a thread
+				WI.parser(WIrequest("omw", geodata, reduced=True, callback=lambda reduced, error, geodata=geodata: check(geodata, reduced, error)))
+			else:
+				check(geodata, WI.start(geodata=geodata, reduced=True), WI.error)
+
+	start = perf_counter()
+	workers = [Thread(target=worker, args=(thread,)) for thread in range(threads)]
+	with redirect_stdout(StringIO()):  # mute the progress messages of the callback path
+		for thread in workers:
+			thread.start()
+		for thread in workers:
+			thread.join()
+	elapsed = perf_counter() - start
+	server.shutdown()
+	print("{0:<36}{1:>9}".format("calls", threads * calls))
+	print("{0:<36}{1:>9}".format("mixed up or failed results", len(failures)))
+	print("{0:<36}{1:>9.1f} calls/s".format("throughput", threads * calls / elapsed))
+	for geodata, result in failures[:5]:
+		print("FAILED: %s -> %s" % (geodata[0], result))
+	return not failures
+
+
+def benchconstruct(number=2000, keep=1000):  # costs of creating Weatherinfo instances, e.g. one per city or per screen
+	from Weatherinfo import Weatherinfo
+	print("\n[construct] best of 5 x %s instances, memory of %s live instances" % (number, keep))
+	for mode in ("msn", "omw", "owm"):
+		Weatherinfo(mode)  # first instance pays for lazy module-level work
+		best = min(timeitrepeat(lambda: Weatherinfo(mode), number=number, repeat=5)) / number
+		tracestart()
+		instances = [Weatherinfo(mode) for idx in range(keep)]
+		size = get_traced_memory()[0] / len(instances)
+		tracestop()
+		print("{0:<36}{1:>9.1f} us{2:>9.0f} bytes/instance".format("Weatherinfo('%s')" % mode, best * 1000000, size))
+
+
+def measure(function, repeat):  # returns (durations in seconds, peak of traced memory during one call in bytes)
+	times = []
+	for idx in range(repeat):
+		start = perf_counter()
+		function()
+		times.append(perf_counter() - start)
+	tracestart()
+	function()
+	peak = get_traced_memory()[1]
+	tracestop()
+	return times, peak
+
+
+def report(text, times, peak):
+	cuts = quantiles(times, n=100)
+	print("{0:<30}{1:>9.3f}{2:>9.3f}{3:>9.3f}{4:>11.0f}{5:>11.1f}".format(text, cuts[49] * 1000, cuts[89] * 1000, cuts[98] * 1000, len(times) / sum(times), peak / 1024))
+
+
+def rewrite(WI, write, filename):  # the writers skip unchanged contents: without a former file (and write) every call writes
+	def function():
+		WI.written.clear()
+		if isfile(filename):
+			remove(filename)
+		write(filename)
+	return function
+
+
+def benchpipeline(repeat=200):  # fetch, parse, reduce and JSON write of every provider, replayed by the local stub server
+	from Weatherinfo import Weatherinfo, WIgeoindex, WIrequest, WIselector
+	print("\n[pipeline] %s runs per stage against the local stub server (%s)" % (repeat, "recorded fixtures" if isfile(join(FIXTURES, "v1_forecast.json")) else "built-in payloads"))
+	print("{0:<30}{1:>9}{2:>9}{3:>9}{4:>11}{5:>11}".format("stage", "p50 ms", "p90 ms", "p99 ms", "ops/s", "peak kB"))
+	server = StubServer()
+	session = server.session()
+	handle, filename = mkstemp(suffix=".json")
+	close(handle)
+	geodata = ("Berlin, DE", 13.4105, 52.5244)
+	failures = []
+	for mode in ("msn", "omw", "owm"):
+		WI = Weatherinfo(mode, apikey="stub" if mode == "owm" else None, session=session)
+		req = WIrequest(mode, geodata, reduced=True)
+		WI.fetchinfo(req)
+		payloads = [session.get(link, params=params).content for link, params, cachekey in WI.requestlinks(req)]
+		selector = WIselector.forsource(mode)
+		req.result = WI.reduceinfo(req)
+		if req.error or not req.result:
+			failures.append("%s: %s" % (mode, req.error or "no data"))
+			continue
+		req.dataReady = True
+		WI.finish(req)  # the instance publishes the request, like 'start' does
+		stages = [("fetch", lambda: WI.fetchinfo(WIrequest(mode, geodata, reduced=True))),
+				("parse (json.loads)", lambda: [loads(payload) for payload in payloads]),
+				("parse (WIselector)", lambda: [selector.loads(payload) for payload in payloads]) if selector else None,
+				("reduce", lambda: WI.reduceinfo(req)),
+				("write json", rewrite(WI, WI.writejson, filename)),
+				("write json (unchanged)", lambda: WI.writejson(filename)),
+				("write reduced json", rewrite(WI, WI.writereducedjson, filename)),
+				("write reduced json (unch.)", lambda: WI.writereducedjson(filename)),
+				("citylist", lambda: WI.getCitylist("Berlin", request=WIrequest(mode, None)))
+				]
+		for text, function in filter(None, stages):
+			report("%s %s" % (mode, text), *measure(function, repeat))
+			if WI.error:
+				failures.append("%s %s: %s" % (mode, text, WI.error))
+	WI = Weatherinfo("omw", session=session, geoindex=WIgeoindex())
+	WI.getCitylist("Berlin")
+	report("omw citylist (WIgeoindex)", *measure(lambda: WI.getCitylist("Berlin"), repeat))
+	server.shutdown()
+	remove(filename)
+	for failure in failures:
+		print("FAILED: %s" % failure)
+	return not failures
+
+
+def record(apikey=None):  # stores the answers of the real providers (online) as fixtures for the stub server, 'owm' needs an API-key
+	from requests import get
+	from Weatherinfo import Weatherinfo, WIrequest
+	makedirs(FIXTURES, exist_ok=True)
+	geodata = ("Berlin, DE", 13.4105, 52.5244)
+	links = [("https://geocoding-api.open-meteo.com/v1/search", [("language", "de"), ("count", "10"), ("name", "Berlin")])]
+	if apikey:
+		links.append(("http://api.openweathermap.org/geo/1.0/direct", [("q", "Berlin"), ("lang", "de"), ("limit", "10"), ("appid", apikey)]))
+	for mode in ("msn", "omw", "owm") if apikey else ("msn", "omw"):
+		WI = Weatherinfo(mode, apikey)
+		links += [(link, params) for link, params, cachekey in WI.requestlinks(WIrequest(mode, geodata, reduced=True))]
+	for link, params in links:
+		response = get(link, params=params, headers=WI.headers, timeout=(3.05, 6))
+		filename = join(FIXTURES, "%s.json" % urlsplit(link).path.strip("/").replace("/", "_"))
+		if response.status_code == 200:
+			with open(filename, "wb") as f:
+				f.write(response.content)
+		print("{0:<44}{1:>5} {2:>9} bytes".format(filename[len(HERE) + 1:], response.status_code, len(response.content)))
+
+
+SCENARIOS = {"imports": benchimports, "construct": benchconstruct, "pipeline": benchpipeline, "stress": benchstress}
+
+
+def main(argv):
+	if argv[:1] == ["record"]:  # online, not a benchmark
+		record(*argv[1:2])
+		return
+	names = argv or list(SCENARIOS)
+	for name in names:
+		if name not in SCENARIOS:
+			print("ERROR: unknown scenario '%s'. Valid scenarios: '%s'" % (name, "', '".join(SCENARIOS)))
+			exit(2)
+	failed = [name for name in names if SCENARIOS[name]() is False]
+	if failed:
+		exit(1)
+
+
+if __name__ == "__main__":
+	main(argv[1:])
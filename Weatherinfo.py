@@ -12,144 +12,1532 @@
 #########################################################################################################
 
 from sys import exit, argv
-from json import dump, loads
-from datetime import datetime, timedelta
-from requests import get, exceptions
+from os import fdopen, makedirs, remove, replace, scandir, utime
+from os.path import dirname, isfile, join
+from json import JSONDecoder, dumps, loads
+from hashlib import sha1
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from math import floor
+from time import perf_counter, time
+from datetime import date, datetime, timedelta, timezone
 from getopt import getopt, GetoptError
-from random import choice
-from twisted.internet.reactor import callInThread
+from locale import LC_TIME, setlocale
+from bisect import bisect_left, insort
+from heapq import heappop, heappush
+from random import choice, uniform
+from re import compile
+from struct import Struct
+from threading import Event, Lock, RLock
+from types import MappingProxyType
+# twisted, requests, asyncio and friends are imported on first use only: they dominate the startup time on set-top boxes
 
 
 class WIglobals:
 	MODULE_NAME = __name__.split(".")[-1]
+	OMWBATCH = 50  # max. number of locations per Open-Meteo call
 	SOURCES = ["msn", "omw", "owm"]  # supported sourcecodes (the order must not be changed)
 	DESTINATIONS = ["yahoo", "meteo"]  # supported iconcodes (the order must not be changed)
+	GRIDS = {"msn": 0.05, "omw": 0.025, "owm": 0.05}  # degrees per grid cell of 'Weatherinfo(grid=True)', about the resolution of the provider models
 
 
 wiglobals = WIglobals()
 
 
+def atomicwrite(filename, data):  # readers never see a partially written file
+	from tempfile import mkstemp
+	fd, tmpname = mkstemp(dir=dirname(filename) or ".", suffix=".tmp")
+	try:
+		with fdopen(fd, "wb") as f:
+			f.write(data)
+		replace(tmpname, filename)
+	except OSError:
+		try:
+			remove(tmpname)
+		except OSError:
+			pass
+		raise
+
+
+def jsondiff(old, new, path=(), removed=None):  # changed entries of 'new' against 'old' and the key paths removed from 'old': nested dicts are compared key by key, anything else is replaced as a whole
+	removed = [] if removed is None else removed
+	if not isinstance(old, dict) or not isinstance(new, dict):
+		return new, removed
+	removed.extend(list(path) + [key] for key in old if key not in new)
+	changes = {}
+	for key, value in new.items():
+		if key not in old:
+			changes[key] = value
+		elif old[key] != value:
+			changes[key] = jsondiff(old[key], value, path + (key,), removed)[0] if isinstance(value, dict) and isinstance(old[key], dict) else value
+	return changes, removed
+
+
+def jsonmerge(old, changes, removed=()):  # counterpart of 'jsondiff': returns 'new' ('old' is not modified)
+	if not isinstance(old, dict) or not isinstance(changes, dict):
+		return changes
+	new = {key: value for key, value in old.items() if key not in changes}
+	for key, value in changes.items():
+		new[key] = jsonmerge(old[key], value) if isinstance(value, dict) and isinstance(old.get(key), dict) else value
+	for path in removed:
+		node = new
+		for key in path[:-1]:
+			node[key] = dict(node[key])  # copied, a removal must not reach into 'old'
+			node = node[key]
+		node.pop(path[-1], None)
+	return new
+
+
+class WImetrics:  # durations per stage (fetch, parse, reduce, write) as histograms, event counters and hooks, exported as Prometheus text or JSON
+	BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+	def __init__(self):
+		self.histograms = {}  # (stage, mode, host): [counts per bucket + overflow, sum of durations, bytes]
+		self.counters = Counter()  # (name, mode, result): count, e.g. ("cache", "msn", "hit")
+		self.hooks = []  # hook(event, info): event = "start" or "stop", info = {"stage", "mode", "host", "bytes", "status", "duration", "error"}
+		self.lock = Lock()
+
+	def addhook(self, hook):
+		self.hooks = self.hooks + [hook]
+
+	def removehook(self, hook):
+		self.hooks = [item for item in self.hooks if item != hook]
+
+	@contextmanager
+	def stage(self, stage, mode=None, host=None):  # with metrics.stage("fetch", "msn", host) as info: ... info["bytes"] = ...
+		info = {"stage": stage, "mode": mode, "host": host}
+		for hook in self.hooks:
+			hook("start", info)
+		start = perf_counter()
+		try:
+			yield info
+		except Exception as err:
+			info.setdefault("error", err.__class__.__name__)
+			raise
+		finally:
+			info["duration"] = perf_counter() - start
+			self.observe(info)
+			for hook in self.hooks:
+				hook("stop", info)
+
+	def observe(self, info):
+		key = (info["stage"], info.get("mode"), info.get("host"))
+		idx = bisect_left(self.BUCKETS, info["duration"])
+		with self.lock:
+			histogram = self.histograms.get(key)
+			if histogram is None:
+				histogram = self.histograms[key] = [[0] * (len(self.BUCKETS) + 1), 0.0, 0]
+			histogram[0][idx] += 1
+			histogram[1] += info["duration"]
+			histogram[2] += info.get("bytes") or 0
+			if info.get("error"):
+				self.counters[("errors", info.get("mode"), info["stage"])] += 1
+
+	def record(self, stage, mode, duration, **info):  # a stage measured elsewhere, e.g. the parse time inside a fetch
+		info.update(stage=stage, mode=mode, duration=duration)
+		info.setdefault("host", None)
+		self.observe(info)
+		for hook in self.hooks:
+			hook("stop", info)
+
+	@staticmethod
+	def host(link):
+		parts = link.split("/")
+		return parts[2] if len(parts) > 2 else None
+
+	def count(self, name, mode=None, result=None):
+		with self.lock:
+			self.counters[(name, mode, result)] += 1
+
+	def labels(self, **labels):
+		return ",".join('%s="%s"' % (name, value) for name, value in labels.items() if value is not None)
+
+	def prometheus(self):  # text exposition format 0.0.4
+		with self.lock:
+			histograms = {key: (list(counts), total, size) for key, (counts, total, size) in self.histograms.items()}
+			counters = dict(self.counters)
+		lines = ["# HELP weatherinfo_stage_seconds Duration of the stages fetch, parse, reduce and write.", "# TYPE weatherinfo_stage_seconds histogram"]
+		for (stage, mode, host), (counts, total, size) in sorted(histograms.items(), key=str):
+			labels = self.labels(stage=stage, mode=mode, host=host)
+			cumulated = 0
+			for bound, count in zip(self.BUCKETS + ("+Inf",), counts):
+				cumulated += count
+				lines.append('weatherinfo_stage_seconds_bucket{%s,le="%s"} %s' % (labels, bound, cumulated))
+			lines += ["weatherinfo_stage_seconds_sum{%s} %s" % (labels, total), "weatherinfo_stage_seconds_count{%s} %s" % (labels, cumulated)]
+		lines += ["# HELP weatherinfo_stage_bytes_total Bytes received (fetch) or written (write).", "# TYPE weatherinfo_stage_bytes_total counter"]
+		lines += ["weatherinfo_stage_bytes_total{%s} %s" % (self.labels(stage=stage, mode=mode, host=host), size) for (stage, mode, host), (counts, total, size) in sorted(histograms.items(), key=str) if size]
+		lines += ["# HELP weatherinfo_events_total Cache and memo results, errors per stage.", "# TYPE weatherinfo_events_total counter"]
+		lines += ["weatherinfo_events_total{%s} %s" % (self.labels(event=name, mode=mode, result=result), count) for (name, mode, result), count in sorted(counters.items(), key=str)]
+		return "\n".join(lines) + "\n"
+
+	def snapshot(self):  # JSON-able, durations in milliseconds, p50/p95 estimated from the buckets
+		with self.lock:
+			histograms = {key: (list(counts), total, size) for key, (counts, total, size) in self.histograms.items()}
+			counters = dict(self.counters)
+		stages = []
+		for (stage, mode, host), (counts, total, size) in sorted(histograms.items(), key=str):
+			number = sum(counts)
+			stages.append({"stage": stage, "mode": mode, "host": host, "count": number, "bytes": size, "mean": round(total / number * 1000, 3),
+						"p50": self.percentile(counts, 0.5), "p95": self.percentile(counts, 0.95)})
+		return {"stages": stages, "events": [{"event": name, "mode": mode, "result": result, "count": count} for (name, mode, result), count in sorted(counters.items(), key=str)]}
+
+	def percentile(self, counts, fraction):  # upper bound of the bucket in milliseconds, None = above the last bucket
+		needed, cumulated = fraction * sum(counts), 0
+		for bound, count in zip(self.BUCKETS, counts):
+			cumulated += count
+			if cumulated >= needed:
+				return bound * 1000
+
+	def clear(self):
+		with self.lock:
+			self.histograms.clear()
+			self.counters.clear()
+
+
+wimetrics = WImetrics()
+
+
+class WIselector:  # selective JSON parser: only the parts of a payload named by the paths are turned into Python objects
+	# MSN only: it halves the peak memory at about 2.4x the parse time, for OMW (nearly all fields used) and OWM (many small items) json.loads is faster and not larger
+	PATHS = {"msn": [("units",),
+					("responses", 0, "source", "coordinates"),
+					("responses", 0, "weather", 0, "current"),
+					("responses", 0, "weather", 0, "forecast", "days", "*", "almanac"),
+					("responses", 0, "weather", 0, "forecast", "days", "*", "daily"),
+					("responses", 0, "weather", 0, "forecast", "days", "*", "hourly", 0),
+					("responses", 0, "weather", 0, "nowcasting", "shortSummary"),
+					("responses", 0, "weather", 0, "lifeDaily", "days", 0, "umbrellaIndex")
+					]
+			}  # the fields used by 'Weatherinfo.getreducedinfo', "*" = every list item
+	selectors = {}
+
+	def __init__(self, name, paths):
+		self.name = name
+		self.paths = [tuple(path) for path in paths]
+		self.decode = JSONDecoder().scan_once  # the C scanner of the json module: (value, end) = decode(text, pos)
+		self.whitespace = compile(r"[ \t\n\r]*").match
+		self.separators = compile(r"[ \t\n\r]*([,:\]}])[ \t\n\r]*").match
+
+	@classmethod
+	def forsource(cls, mode):
+		if mode not in cls.selectors and mode in cls.PATHS:
+			cls.selectors[mode] = cls(mode, cls.PATHS[mode])
+		return cls.selectors.get(mode)
+
+	def loads(self, data):  # data: str or UTF-8 encoded bytes
+		text = data.decode("utf-8") if isinstance(data, (bytes, bytearray)) else data
+		try:
+			value, pos = self.value(text, self.whitespace(text, 0).end(), self.paths)
+		except StopIteration as err:  # raised by the scanner
+			raise ValueError("Expecting value: char %s" % err.value) from None
+		if self.whitespace(text, pos).end() != len(text):
+			raise ValueError("Extra data: char %s" % pos)
+		return value
+
+	def separator(self, text, pos, expected):  # returns (separator, position of the next token)
+		match = self.separators(text, pos)
+		if not match or match.group(1) not in expected:
+			raise ValueError("Expecting one of '%s': char %s" % (expected, pos))
+		return match.group(1), match.end()
+
+	def value(self, text, pos, paths):  # returns (value, position after value), unselected values are skipped by the C decoder
+		if () in paths or text[pos:pos + 1] not in ("{", "["):
+			return self.decode(text, pos)
+		if text[pos] == "{":
+			result, pos = {}, self.whitespace(text, pos + 1).end()
+			if text[pos:pos + 1] == "}":
+				return result, pos + 1
+			char = ","
+			while char == ",":
+				key, pos = self.decode(text, pos)
+				pos = self.separator(text, pos, ":")[1]
+				subpaths = [path[1:] for path in paths if path[0] == key]
+				if subpaths:
+					result[key], pos = self.value(text, pos, subpaths)
+				else:
+					pos = self.decode(text, pos)[1]
+				char, pos = self.separator(text, pos, ",}")
+			return result, pos
+		result, pos, idx = [], self.whitespace(text, pos + 1).end(), 0
+		if text[pos:pos + 1] == "]":
+			return result, pos + 1
+		char = ","
+		while char == ",":
+			subpaths = [path[1:] for path in paths if path[0] == "*" or path[0] == idx]
+			if subpaths:
+				item, pos = self.value(text, pos, subpaths)
+				result.append(item)
+			else:
+				pos = self.decode(text, pos)[1]
+			idx += 1
+			char, pos = self.separator(text, pos, ",]")
+		return result, pos
+
+
+class WIsession:  # pooled keep-alive connections, shared by all Weatherinfo instances unless an own session is given
+	sharedsession = None
+	sharedlock = Lock()
+
+	def __init__(self, hosts=10, poolsize=10, keepalive=True, retries=2, backoff=0.3, maxvalidators=64, readretries=0):
+		from requests import Session
+		from requests.adapters import HTTPAdapter, Retry
+		self.hosts = hosts  # number of cached host pools
+		self.poolsize = poolsize  # max. number of reusable connections per host
+		self.keepalive = keepalive
+		self.retries = retries  # connection errors and 429/5xx answers
+		self.readretries = readretries  # read timeouts: each retry may add the full read timeout (6s) to a request, so none by default
+		self.backoff = backoff  # sleeps between retries: backoff * (2 ** (retry - 1)) seconds
+		retry = Retry(total=retries, connect=retries, read=readretries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(["GET"]), raise_on_status=False)
+		adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=poolsize, max_retries=retry)
+		self.session = Session()
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		if not keepalive:
+			self.session.headers["Connection"] = "close"
+		self.validators = OrderedDict()  # requestkey: {"etag", "modified", "expires", "data"}
+		self.maxvalidators = maxvalidators
+		self.lock = Lock()
+
+	@classmethod
+	def shared(cls):
+		with cls.sharedlock:
+			if cls.sharedsession is None:
+				cls.sharedsession = cls()
+			return cls.sharedsession
+
+	def get(self, link, headers=None, params=None, timeout=(3.05, 6)):
+		return self.session.get(link, headers=headers, params=params, timeout=timeout)
+
+	def requestkey(self, link, params=None, select=None):
+		return (link, tuple(params) if params else None, select.name if select else None)
+
+	def getjson(self, link, headers=None, params=None, timeout=(3.05, 6), select=None, stats=None):  # conditional GET: unchanged data is neither downloaded nor parsed again
+		stats = {} if stats is None else stats  # filled with "status", "bytes", "parse" (seconds) and "source" ("fresh", "notmodified" or "network")
+		requestkey = self.requestkey(link, params, select)
+		with self.lock:
+			entry = self.validators.get(requestkey)
+		if entry and time() < entry["expires"]:
+			stats["source"] = "fresh"
+			return entry["data"]  # still fresh according to 'Cache-Control: max-age'
+		headers = dict(headers or {})
+		if entry and entry["etag"]:
+			headers["If-None-Match"] = entry["etag"]
+		if entry and entry["modified"]:
+			headers["If-Modified-Since"] = entry["modified"]
+		response = self.get(link, headers=headers, params=params, timeout=timeout)
+		stats["status"] = response.status_code
+		if response.status_code == 304 and entry:
+			stats["source"] = "notmodified"
+			entry["expires"] = self.expiration(response)
+			return entry["data"]
+		response.raise_for_status()
+		stats["source"], stats["bytes"] = "network", len(response.content)
+		start = perf_counter()
+		data = select.loads(response.content) if select else loads(response.content)
+		stats["parse"] = perf_counter() - start
+		etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+		expires = self.expiration(response)
+		with self.lock:
+			if etag or modified or expires:
+				self.validators[requestkey] = {"etag": etag, "modified": modified, "expires": expires, "data": data}
+				self.validators.move_to_end(requestkey)
+				while len(self.validators) > self.maxvalidators:
+					self.validators.popitem(last=False)
+			else:
+				self.validators.pop(requestkey, None)
+		return data
+
+	def expires(self, link, params=None, select=None):  # end of freshness of the stored response, 0 = unknown or must be revalidated
+		with self.lock:
+			entry = self.validators.get(self.requestkey(link, params, select))
+		return entry["expires"] if entry else 0
+
+	def expiration(self, response):
+		maxage = 0
+		for directive in response.headers.get("Cache-Control", "").lower().split(","):
+			directive = directive.strip()
+			if directive in ("no-cache", "no-store"):
+				return 0
+			if directive.startswith("max-age="):
+				try:
+					maxage = int(directive[8:]) - int(response.headers.get("Age", 0))
+				except ValueError:
+					maxage = 0
+		return time() + maxage if maxage > 0 else 0
+
+	def close(self):
+		self.session.close()
+
+
+class WIcache:  # persistent response cache with per-endpoint TTLs and LRU eviction
+	TTLS = {"geocoding": 2592000, "forecast": 300, "current": 300}  # seconds
+	sharedcaches = {}  # path: WIcache, see 'shared'
+	ENTRY = compile(r"[0-9a-f]{40}\.json$").match  # names of the own files (see 'filename'), other files in the folder are never touched
+	sharedlock = Lock()
+
+	def __init__(self, path=None, ttls=None, maxentries=256, maxbytes=20971520):
+		from tempfile import gettempdir
+		self.path = path or join(gettempdir(), "Weatherinfo")
+		self.ttls = dict(self.TTLS, **(ttls or {}))
+		self.maxentries = maxentries
+		self.maxbytes = maxbytes
+		self.memory = OrderedDict()  # filename: (storetime, data)
+		self.lock = Lock()
+		self.hits, self.misses = 0, 0
+		makedirs(self.path, exist_ok=True)
+
+	@classmethod
+	def shared(cls, path=None):  # one cache per folder, so its in-memory entries survive repeated 'cache=True'
+		with cls.sharedlock:
+			if path not in cls.sharedcaches:
+				cls.sharedcaches[path] = cls(path)
+			return cls.sharedcaches[path]
+
+	def filename(self, key):  # key = (endpoint, mode, ...)
+		return join(self.path, "%s.json" % sha1(repr(key).encode("utf-8")).hexdigest())
+
+	def get(self, key):
+		filename = self.filename(key)
+		with self.lock:
+			entry = self.memory.get(filename)
+			if entry:
+				self.memory.move_to_end(filename)
+		if entry is None:
+			try:
+				with open(filename, "rb") as f:
+					content = loads(f.read())
+				entry = (content["stored"], content["data"])
+				utime(filename)  # mark as recently used
+			except (OSError, ValueError, KeyError):
+				entry = None
+		if entry and time() - entry[0] < self.ttls.get(key[0], 0):
+			with self.lock:
+				self.memory[filename] = entry
+				self.memory.move_to_end(filename)
+				self.hits += 1
+				self.trim()
+			return entry[1]
+		with self.lock:
+			self.memory.pop(filename, None)
+			self.misses += 1
+
+	def put(self, key, data):
+		filename = self.filename(key)
+		stored = time()
+		try:
+			atomicwrite(filename, dumps({"stored": stored, "key": repr(key), "data": data}).encode("utf-8"))
+		except OSError as err:
+			print("[%s] WARNING in module 'WIcache.put': %s" % (wiglobals.MODULE_NAME, str(err)))
+		with self.lock:
+			self.memory[filename] = (stored, data)
+			self.memory.move_to_end(filename)
+			self.trim()
+		self.evict()
+
+	def trim(self):
+		while len(self.memory) > self.maxentries:
+			self.memory.popitem(last=False)
+
+	def evict(self):  # remove least recently used files until the limits are kept
+		try:
+			files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in scandir(self.path) if self.ENTRY(entry.name))
+		except OSError:
+			return
+		count, total = len(files), sum(item[1] for item in files)
+		for mtime, size, filename in files:
+			if count <= self.maxentries and total <= self.maxbytes:
+				break
+			try:
+				remove(filename)
+			except OSError:
+				pass
+			with self.lock:
+				self.memory.pop(filename, None)
+			count -= 1
+			total -= size
+
+	def clear(self):
+		with self.lock:
+			self.memory.clear()
+		for entry in scandir(self.path):
+			if self.ENTRY(entry.name):
+				remove(entry.path)
+
+
+class WIsnapshot:  # versioned binary snapshot of full or reduced data: strings stored once, numeric lists as packed arrays, readable in place (mmap)
+	MAGIC = b"WISNAP"
+	VERSION = 1
+	HEADER = Struct("<6sBBdI4x")  # magic, version, kind (0 = full, 1 = reduced), storetime, offset of the root node
+	COUNT, INT, FLOAT, REF = Struct("<I"), Struct("<q"), Struct("<d"), Struct("<II")
+	KINDS = {"full": 0, "reduced": 1}
+
+	def __init__(self, buffer):  # buffer: bytes or mmap of a snapshot
+		if len(buffer) < self.HEADER.size:
+			raise ValueError("snapshot is too short")
+		magic, version, kind, stored, root = self.HEADER.unpack_from(buffer, 0)
+		if magic != self.MAGIC or version != self.VERSION:
+			raise ValueError("no snapshot of version %s" % self.VERSION)
+		self.buffer, self.kind, self.stored, self.root = buffer, kind, stored, root
+		self.strings = {}  # offset: str, every string is decoded once
+		self.views = {}  # offset: memoryview of an array handed out, released by 'close'
+
+	def close(self):  # releases the file of 'open': on Windows a mapped file can not be replaced (see 'atomicwrite'), views are invalid from now on
+		for view in self.views.values():
+			view.release()
+		self.views = {}
+		if hasattr(self.buffer, "close"):
+			self.buffer.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	@classmethod
+	def dumps(cls, data, kind="full"):
+		buffer = bytearray(cls.HEADER.size)
+		known = {}  # (type, value): offset of strings and constants already written
+
+		def encode(value):
+			if value is None or value is True or value is False or isinstance(value, str):
+				key = (value.__class__, value)
+				if key not in known:
+					known[key] = len(buffer)
+					if isinstance(value, str):
+						text = value.encode("utf-8")
+						buffer.extend(b"s" + cls.COUNT.pack(len(text)) + text)
+					else:
+						buffer.extend({None: b"N", True: b"T", False: b"F"}[value])
+				return known[key]
+			if isinstance(value, int):
+				offset = len(buffer)
+				buffer.extend(b"i" + cls.INT.pack(value) if -2 ** 63 <= value < 2 ** 63 else b"I" + cls.COUNT.pack(len(str(value))) + str(value).encode("ascii"))
+				return offset
+			if isinstance(value, float):
+				offset = len(buffer)
+				buffer.extend(b"f" + cls.FLOAT.pack(value))
+				return offset
+			if isinstance(value, (list, tuple)):
+				if value and all(type(item) is float for item in value):
+					return array("a", "d", value)
+				if value and all(type(item) is int and -2 ** 63 <= item < 2 ** 63 for item in value):
+					return array("q", "q", value)
+				offsets = [encode(item) for item in value]
+				offset = len(buffer)
+				buffer.extend(b"l" + cls.COUNT.pack(len(offsets)) + Struct("<%sI" % len(offsets)).pack(*offsets))
+				return offset
+			if isinstance(value, dict):
+				if all(isinstance(key, str) and "\0" not in key for key in value):  # keys as one text, a reader splits them at once
+					refs = [encode(item) for item in value.values()]
+					keys = "\0".join(value).encode("utf-8")
+					offset = len(buffer)
+					buffer.extend(b"d" + cls.COUNT.pack(len(value)) + Struct("<%sI" % len(refs)).pack(*refs) + cls.COUNT.pack(len(keys)) + keys)
+					return offset
+				refs = [offset for key, item in value.items() for offset in (encode(key), encode(item))]
+				offset = len(buffer)
+				buffer.extend(b"D" + cls.COUNT.pack(len(value)) + Struct("<%sI" % len(refs)).pack(*refs))
+				return offset
+			raise TypeError("type '%s' can not be stored in a snapshot" % value.__class__.__name__)
+
+		def array(tag, code, values):  # the values start at a multiple of 8, so readers can cast them in place
+			buffer.extend(bytes(-(len(buffer) + 5) % 8))
+			offset = len(buffer)
+			buffer.extend(tag.encode("ascii") + cls.COUNT.pack(len(values)) + Struct("<%s%s" % (len(values), code)).pack(*values))
+			return offset
+
+		root = encode(data)
+		cls.HEADER.pack_into(buffer, 0, cls.MAGIC, cls.VERSION, cls.KINDS.get(kind, 0), time(), root)
+		return bytes(buffer)
+
+	@classmethod
+	def write(cls, filename, data, kind="full"):
+		atomicwrite(filename, cls.dumps(data, kind))
+
+	@classmethod
+	def load(cls, filename):  # the complete data as dict
+		with open(filename, "rb") as f:
+			snapshot = cls(f.read())
+		return snapshot.decode(snapshot.root)
+
+	@classmethod
+	def open(cls, filename):  # read-only view in place: nodes are decoded when accessed, numeric lists are memoryviews of the file. The file stays mapped until 'close' (with WIsnapshot.open(filename) as view: ...)
+		from mmap import ACCESS_READ, mmap
+		with open(filename, "rb") as f:
+			snapshot = cls(mmap(f.fileno(), 0, access=ACCESS_READ))
+		return snapshot.node(snapshot.root)
+
+	def decode(self, offset):  # node -> Python objects
+		tag = self.buffer[offset:offset + 1]
+		if tag in (b"d", b"D"):
+			return {key: self.decode(ref) for key, ref in self.keyindex(offset).items()}
+		if tag == b"l":
+			return [self.decode(ref) for ref in self.refs(offset)]
+		if tag in (b"a", b"q"):
+			return self.array(offset).tolist()
+		return self.scalar(offset, tag)
+
+	def node(self, offset):  # node -> lazy view, scalars are decoded
+		tag = self.buffer[offset:offset + 1]
+		if tag in (b"d", b"D"):
+			return WIsnapdict(self, offset)
+		if tag == b"l":
+			return WIsnaplist(self, offset)
+		if tag in (b"a", b"q"):
+			return self.array(offset)
+		return self.scalar(offset, tag)
+
+	def scalar(self, offset, tag):
+		if tag == b"s":
+			text = self.strings.get(offset)
+			if text is None:
+				size = self.COUNT.unpack_from(self.buffer, offset + 1)[0]
+				text = self.strings[offset] = str(self.buffer[offset + 5:offset + 5 + size], "utf-8")
+			return text
+		if tag == b"f":
+			return self.FLOAT.unpack_from(self.buffer, offset + 1)[0]
+		if tag == b"i":
+			return self.INT.unpack_from(self.buffer, offset + 1)[0]
+		if tag == b"I":
+			size = self.COUNT.unpack_from(self.buffer, offset + 1)[0]
+			return int(self.buffer[offset + 5:offset + 5 + size])
+		if tag in (b"N", b"T", b"F"):
+			return {b"N": None, b"T": True, b"F": False}[tag]
+		raise ValueError("unknown node '%s' at %s" % (tag, offset))
+
+	def refs(self, offset):  # offsets of list items, dict values ("d") or dict keys and values alternating ("D")
+		count = self.COUNT.unpack_from(self.buffer, offset + 1)[0] * (2 if self.buffer[offset:offset + 1] == b"D" else 1)
+		return Struct("<%sI" % count).unpack_from(self.buffer, offset + 5)
+
+	def keyindex(self, offset):  # {key: offset of the value} of a dict node
+		refs = self.refs(offset)
+		if self.buffer[offset:offset + 1] == b"D":
+			return {self.decode(refs[idx]): refs[idx + 1] for idx in range(0, len(refs), 2)}
+		start = offset + 5 + len(refs) * 4
+		size = self.COUNT.unpack_from(self.buffer, start)[0]
+		return dict(zip(str(self.buffer[start + 4:start + 4 + size], "utf-8").split("\0"), refs)) if refs else {}
+
+	def array(self, offset):
+		if offset not in self.views:
+			count = self.COUNT.unpack_from(self.buffer, offset + 1)[0]
+			with memoryview(self.buffer) as view:  # the slice keeps the buffer, not the whole view
+				self.views[offset] = view[offset + 5:offset + 5 + count * 8].cast("d" if self.buffer[offset:offset + 1] == b"a" else "q")
+		return self.views[offset]
+
+
+class WIsnapnode:  # lazy node of a WIsnapshot, closing any node releases the whole snapshot
+	def close(self):
+		self.snapshot.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.snapshot.close()
+
+
+class WIsnapdict(WIsnapnode, Mapping):  # dict node of a WIsnapshot, the index of the keys is built on first access
+	def __init__(self, snapshot, offset):
+		self.snapshot, self.offset, self.index = snapshot, offset, None
+
+	def keyindex(self):
+		if self.index is None:
+			self.index = self.snapshot.keyindex(self.offset)
+		return self.index
+
+	def __getitem__(self, key):
+		return self.snapshot.node(self.keyindex()[key])
+
+	def __iter__(self):
+		return iter(self.keyindex())
+
+	def __len__(self):
+		return self.snapshot.COUNT.unpack_from(self.snapshot.buffer, self.offset + 1)[0]
+
+	def todict(self):
+		return self.snapshot.decode(self.offset)
+
+
+class WIsnaplist(WIsnapnode, Sequence):  # list node of a WIsnapshot
+	def __init__(self, snapshot, offset):
+		self.snapshot, self.offset, self.items = snapshot, offset, snapshot.refs(offset)
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return [self.snapshot.node(ref) for ref in self.items[idx]]
+		return self.snapshot.node(self.items[idx])
+
+	def __len__(self):
+		return len(self.items)
+
+	def tolist(self):
+		return self.snapshot.decode(self.offset)
+
+
+class WIgeoindex:  # local geocoding: places from earlier search results or a GeoNames dump, prefix/fuzzy search by name and nearest place by lon/lat
+	VERSION = 1
+	SAVEBATCH = 20  # learned searches per write of the index file, the rest is written by 'flush' (at the latest on exit)
+	sharedindexes = {}  # filename: WIgeoindex, see 'shared'
+	sharedlock = Lock()
+	persistent = None  # WeakSet of indexes with a file, flushed on exit
+	persistentlock = Lock()
+
+	def __init__(self, filename=None):
+		self.filename = filename  # persistent index (JSON), None = in memory only
+		self.places = {}  # label: [lon, lat, country, population, sequence]
+		self.names = []  # sorted (normalized name, label), also for alternate names
+		self.cells = {}  # (int(lon), int(lat)): [label, ...]
+		self.queries = {}  # (normalized query, country, language): ([label, ...], complete) as answered by the provider before, complete = the provider had no more
+		self.complete = False  # True = an imported dump covers all places, every search may be answered locally
+		self.lock = RLock()
+		self.hits, self.misses = 0, 0
+		self.unsaved = 0  # learned searches not written to the file yet
+		if filename:
+			self.load(filename)
+			with self.persistentlock:
+				if WIgeoindex.persistent is None:
+					from atexit import register
+					from weakref import WeakSet
+					WIgeoindex.persistent = WeakSet()
+					register(WIgeoindex.flushall)
+				WIgeoindex.persistent.add(self)
+
+	@classmethod
+	def shared(cls, filename):  # one index per file: it is read once and the searches learned by all users end up in the file
+		with cls.sharedlock:
+			if filename not in cls.sharedindexes:
+				cls.sharedindexes[filename] = cls(filename)
+			return cls.sharedindexes[filename]
+
+	@classmethod
+	def flushall(cls):
+		for index in list(cls.persistent or ()):
+			index.flush()
+
+	@staticmethod
+	def normalize(name):  # case, accents and spacing do not matter: "São  Paulo" -> "sao paulo"
+		from unicodedata import combining, normalize
+		return " ".join("".join(char for char in normalize("NFKD", name) if not combining(char)).casefold().split())
+
+	def add(self, label, lon, lat, country=None, population=0, names=(), bulk=False):  # bulk: caller sorts 'names' when done
+		lon, lat = float(lon), float(lat)
+		parts = label.split(", ")
+		with self.lock:
+			if label in self.places:
+				return
+			self.places[label] = [lon, lat, (country or (parts[-1] if len(parts) > 1 else "")).upper(), population, len(self.places)]
+			for name in {self.normalize(parts[0])} | {self.normalize(name) for name in names if name}:
+				if bulk:
+					self.names.append((name, label))
+				else:
+					insort(self.names, (name, label))
+			self.cells.setdefault((int(lon // 1), int(lat // 1)), []).append(label)
+
+	def learn(self, query, country, language, citylist, count=10):  # results of a provider search for max. 'count' places, the same query is answered locally from now on
+		key = (self.normalize(query), (country or "").upper(), language)
+		labels = [label for label, lon, lat in citylist]
+		with self.lock:
+			for label, lon, lat in citylist:
+				self.add(label, lon, lat)
+			known = self.queries.get(key)
+			if known and not known[1] and len(known[0]) > len(labels):  # a longer answer is kept
+				return
+			self.queries[key] = (labels, len(labels) < count)
+			self.unsaved += 1
+			if self.filename and self.unsaved >= self.SAVEBATCH:  # an index with an imported dump has several MB, written once per batch only
+				self.save()
+
+	def flush(self):  # writes learned searches not saved yet
+		if self.filename and self.unsaved:
+			self.save()
+
+	def lookup(self, query, country=None, language="de", count=10):  # [(label, lon, lat), ...] or None if the provider has to be asked
+		with self.lock:
+			known = self.queries.get((self.normalize(query), (country or "").upper(), language))
+			if known is not None and (known[1] or len(known[0]) >= count):  # a shorter answer of a search for less places is not enough
+				citylist = [(label, self.places[label][0], self.places[label][1]) for label in known[0][:count]]
+			else:
+				citylist = self.search(query, country, count) if self.complete else []
+			if citylist:
+				self.hits += 1
+				return citylist
+			self.misses += 1
+
+	def search(self, query, country=None, count=10):  # exact names first, then names starting with the query, fuzzy matches if none is found
+		query, country = self.normalize(query), (country or "").upper()
+		with self.lock:
+			labels = []
+			for idx in range(bisect_left(self.names, (query,)), len(self.names)):
+				name, label = self.names[idx]
+				if not name.startswith(query):
+					break
+				labels.append((name != query, label))
+			if not labels:
+				from difflib import get_close_matches
+				first, last = bisect_left(self.names, (query[:1],)), bisect_left(self.names, (chr(ord(query[:1] or " ") + 1),))
+				candidates = {name for name, label in self.names[first:last] if abs(len(name) - len(query)) <= 2}  # typos after the first letter
+				close = set(get_close_matches(query, candidates, n=count, cutoff=0.8))
+				labels = [(True, label) for name, label in self.names[first:last] if name in close]
+			hits, seen = [], set()
+			for fuzzy, label in sorted(labels, key=lambda item: (item[0], -self.places[item[1]][3], self.places[item[1]][4])):
+				lon, lat, code, population, sequence = self.places[label]
+				if label in seen or (country and code != country):
+					continue
+				seen.add(label)
+				hits.append((label, lon, lat))
+				if len(hits) >= count:
+					break
+			return hits
+
+	def nearest(self, lon, lat, count=1, radius=3):  # [(label, lon, lat, distance in km), ...] within 'radius' cells of 1 degree around the point
+		from math import asin, cos, radians, sin, sqrt
+
+		def distance(label):
+			lon2, lat2 = self.places[label][:2]
+			a = sin(radians(lat2 - lat) / 2) ** 2 + cos(radians(lat)) * cos(radians(lat2)) * sin(radians(lon2 - lon) / 2) ** 2
+			return 12742 * asin(min(1, sqrt(a)))
+
+		lon, lat = float(lon), float(lat)
+		cell = (int(lon // 1), int(lat // 1))
+		with self.lock:
+			labels = [label for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1) for label in self.cells.get((cell[0] + dx, cell[1] + dy), [])]
+			return [(label, self.places[label][0], self.places[label][1], round(distance(label), 1)) for label in sorted(labels, key=distance)[:count]]
+
+	def importgeonames(self, filename, minpopulation=1000):  # GeoNames dump (e.g. 'cities1000.txt'), tab separated, populated places only
+		places = {}  # label: fields, the biggest of places with the same name in a country wins
+		with open(filename, encoding="utf-8") as f:
+			for line in f:
+				fields = line.rstrip("\n").split("\t")
+				if len(fields) < 15 or fields[6] != "P" or int(fields[14] or 0) < minpopulation:
+					continue
+				label = "%s, %s" % (fields[1], fields[8])
+				if label not in places or int(fields[14] or 0) > int(places[label][14] or 0):
+					places[label] = fields
+		with self.lock:
+			for label, fields in places.items():
+				self.add(label, fields[5], fields[4], fields[8], int(fields[14] or 0), (fields[2],), bulk=True)
+			self.names.sort()
+			self.complete = True
+		return len(places)
+
+	def save(self, filename=None):
+		filename = filename or self.filename
+		with self.lock:
+			names = {}
+			for name, label in self.names:
+				names.setdefault(label, []).append(name)
+			content = {"version": self.VERSION, "complete": self.complete, "queries": [list(key) + [labels, complete] for key, (labels, complete) in self.queries.items()],
+						"places": [[label, place[0], place[1], place[2], place[3], names.get(label, [])] for label, place in sorted(self.places.items(), key=lambda item: item[1][4])]}
+			unsaved = self.unsaved
+		atomicwrite(filename, dumps(content, ensure_ascii=False).encode("utf-8"))
+		if filename == self.filename:
+			with self.lock:
+				self.unsaved -= unsaved  # searches learned while writing stay unsaved
+
+	def load(self, filename):
+		try:
+			with open(filename, "rb") as f:
+				content = loads(f.read())
+		except (OSError, ValueError):
+			return False
+		if content.get("version") != self.VERSION:
+			return False
+		with self.lock:
+			for label, lon, lat, country, population, names in content["places"]:
+				self.add(label, lon, lat, country, population, names, bulk=True)
+			self.names.sort()
+			self.queries.update((tuple(query[:3]), (query[3], query[4] if len(query) > 4 else False)) for query in content["queries"])
+			self.complete = self.complete or content["complete"]
+		return True
+
+
+class WIasyncclient:  # non-blocking HTTP/1.1 client with keep-alive connections for the asyncio engine
+	sharedclient = None
+
+	def __init__(self, limit=100, perhost=10, timeout=(3.05, 6)):
+		self.limit = limit  # max. number of requests in flight
+		self.perhost = perhost  # max. number of idle connections kept per host
+		self.timeout = timeout  # (connect, read) in seconds
+		self.loop, self.semaphore, self.sslcontext = None, None, None
+		self.idle = {}  # (secure, host, port): [(reader, writer), ...]
+
+	@classmethod
+	def shared(cls):
+		if cls.sharedclient is None:
+			cls.sharedclient = cls()
+		return cls.sharedclient
+
+	def prepare(self):  # connections and semaphore belong to the running event loop
+		from asyncio import Semaphore, get_running_loop
+		from ssl import create_default_context
+		loop = get_running_loop()
+		if self.loop is not loop:
+			self.loop, self.idle = loop, {}
+			self.semaphore = Semaphore(self.limit)
+		if self.sslcontext is None:
+			self.sslcontext = create_default_context()
+
+	async def getjson(self, link, headers=None, params=None, select=None):
+		from asyncio import wait_for
+		from urllib.parse import urlencode
+		self.prepare()
+		if params:
+			link = "%s%s%s" % (link, "&" if "?" in link else "?", urlencode(params))
+		async with self.semaphore:
+			status, body = await wait_for(self.request(link, headers or {}), self.timeout[0] + self.timeout[1])
+		if status >= 400:
+			raise ValueError("%s Error for url: %s" % (status, link))
+		return select.loads(body) if select else loads(body)
+
+	async def request(self, link, headers):
+		from asyncio import open_connection, wait_for
+		from urllib.parse import urlsplit
+		parts = urlsplit(link)
+		secure = parts.scheme == "https"
+		key = (secure, parts.hostname, parts.port or (443 if secure else 80))
+		path = "%s%s" % (parts.path or "/", "?%s" % parts.query if parts.query else "")
+		lines = ["GET %s HTTP/1.1" % path, "Host: %s" % parts.netloc, "Accept-Encoding: gzip", "Connection: keep-alive"] + ["%s: %s" % item for item in headers.items()]
+		message = ("%s\r\n\r\n" % "\r\n".join(lines)).encode("latin-1")
+		for attempt in range(2):  # an idle keep-alive connection may have been closed by the server meanwhile
+			connection = self.idle.get(key, []).pop() if self.idle.get(key) else None
+			reused = connection is not None
+			if connection is None:
+				connection = await wait_for(open_connection(key[1], key[2], ssl=self.sslcontext if secure else None), self.timeout[0])
+			reader, writer = connection
+			try:
+				writer.write(message)
+				statusline = await reader.readline()
+				if not statusline and reused:
+					writer.close()
+					continue
+				status = int(statusline.split()[1])
+				response = {}
+				while True:
+					line = await reader.readline()
+					if line in (b"\r\n", b"\n", b""):
+						break
+					name, _, value = line.decode("latin-1").partition(":")
+					response[name.strip().lower()] = value.strip()
+				keepalive = response.get("connection", "").lower() != "close"
+				if response.get("transfer-encoding", "").lower() == "chunked":
+					body = await self.readchunked(reader)
+				elif "content-length" in response:
+					body = await reader.readexactly(int(response["content-length"]))
+				else:
+					body, keepalive = await reader.read(), False
+			except BaseException:
+				writer.close()
+				raise
+			if keepalive and len(self.idle.setdefault(key, [])) < self.perhost:
+				self.idle[key].append(connection)
+			else:
+				writer.close()
+			if response.get("content-encoding", "").lower() == "gzip":
+				from gzip import decompress
+				body = decompress(body)
+			return status, body
+		raise OSError("connection to '%s' was closed" % key[1])
+
+	async def readchunked(self, reader):
+		body = bytearray()
+		while True:
+			size = int((await reader.readline()).split(b";")[0].strip(), 16)
+			if not size:
+				while (await reader.readline()) not in (b"\r\n", b"\n", b""):  # skip trailers
+					pass
+				return bytes(body)
+			body += await reader.readexactly(size)
+			await reader.readline()
+
+
+class WIrequest:  # state of a single forecast request, keeps concurrent requests apart
+	def __init__(self, mode, geodata, units="metric", scheme="de-de", reduced=False, callback=None):
+		self.mode = mode
+		self.geodata = ("", 0, 0) if geodata is None else geodata
+		self.units = units.lower()
+		self.scheme = scheme.lower()
+		self.reduced = reduced
+		self.callback = callback
+		self.info = None
+		self.result = None
+		self.error = None
+		self.dataReady = False
+		self.cache = None  # None = cache of the instance, False = no cache, WIcache = cache of this request only
+
+
+class WIcolumns:  # columnar view of hourly data (Open-Meteo): epoch timestamps, typed arrays, O(1) hour index and per-day aggregates
+	def __init__(self, hourly):
+		self.hourly = hourly
+		self.times = hourly.get("time", [])
+		self.count = len(self.times)
+		self.start = self.epoch(self.times[0]) if self.times else 0
+		self.regular = self.count < 2 or self.epoch(self.times[-1]) - self.start == (self.count - 1) * 3600  # equidistant hours
+		self.columns = {}  # typed arrays, converted on first use
+		self.starts = self.daystarts()
+
+	def epoch(self, isotime):  # seconds of the local wall clock time, free of time zone and DST jumps
+		return int((datetime.fromisoformat(isotime[:16]) - datetime(1970, 1, 1)).total_seconds())
+
+	def daystarts(self):  # index of the first hour of each day
+		if not self.count:
+			return []
+		if self.regular:
+			first = (-self.start % 86400) // 3600
+			return [0] + list(range(first or 24, self.count, 24))
+		return [0] + [idx for idx in range(1, self.count) if self.times[idx][:10] != self.times[idx - 1][:10]]
+
+	def index(self, isotime):  # index of the hour given as "YYYY-MM-DDTHH:MM", None = not found
+		if self.count:
+			idx = (self.epoch(isotime) - self.start) // 3600
+			if 0 <= idx < self.count and isotime in self.times[idx]:
+				return idx
+			if not self.regular:
+				return next((idx for idx, time in enumerate(self.times) if isotime in time), None)
+
+	def stamps(self):  # epoch seconds of all hours
+		from array import array
+		return array("q", range(self.start, self.start + self.count * 3600, 3600) if self.regular else map(self.epoch, self.times))
+
+	def column(self, name, default=None):  # typed array of a column, a list if values are missing (null)
+		if name not in self.columns:
+			if name not in self.hourly:
+				return default
+			from array import array
+			try:
+				self.columns[name] = array("d", self.hourly[name])
+			except (TypeError, ValueError):
+				self.columns[name] = self.hourly[name]
+		return self.columns[name]
+
+	def daily(self, name, how="mean"):  # per-day aggregates ("mean", "min", "max" or "sum") of a column as list of floats
+		values = self.column(name)
+		bounds = list(zip(self.starts, self.starts[1:] + [self.count]))
+		if how == "mean":
+			return [sum(values[start:end]) / (end - start) for start, end in bounds]
+		return [{"min": min, "max": max, "sum": sum}[how](values[start:end]) for start, end in bounds]
+
+
+class WIdates:  # date fields of the reduced view from lookup tables, the day names are formatted once per scheme and locale
+	schemes = {}  # (scheme, locale): WIdates
+	ordinals = {}  # "YYYY-MM-DD": day number, each provider date is parsed once
+	MAXENTRIES = 1024
+
+	def __init__(self, scheme):
+		week = [date(2024, 1, 1) + timedelta(idx) for idx in range(7)]  # monday first, like date.weekday()
+		self.scheme = scheme
+		self.weekdays = tuple(day.strftime("%A") for day in week)
+		self.shortdays = tuple(day.strftime("%a") for day in week)
+		self.fields = {}  # day number: (dayText, day, shortDay, date)
+
+	@classmethod
+	def forscheme(cls, scheme):  # the names follow the locale (LC_TIME) which may be switched at runtime
+		key = (scheme, setlocale(LC_TIME))
+		dates = cls.schemes.get(key)
+		if dates is None:
+			dates = cls.schemes[key] = cls(scheme)
+		return dates
+
+	@classmethod
+	def ordinal(cls, value):  # day number of a date, a datetime or a string starting with "YYYY-MM-DD"
+		if isinstance(value, int):
+			return value
+		if isinstance(value, date):
+			return value.toordinal()
+		number = cls.ordinals.get(value[:10])
+		if number is None:
+			if len(cls.ordinals) >= cls.MAXENTRIES:
+				cls.ordinals.clear()
+			number = cls.ordinals[value[:10]] = date.fromisoformat(value[:10]).toordinal()
+		return number
+
+	def day(self, value):  # returns (dayText, day, shortDay, date) as strftime("%a, %d."), ("%A"), ("%a") and ("%Y-%m-%d")
+		number = self.ordinal(value)
+		fields = self.fields.get(number)
+		if fields is None:
+			when = date.fromordinal(number)
+			weekday = when.weekday()
+			if len(self.fields) >= self.MAXENTRIES:
+				self.fields.clear()
+			fields = self.fields[number] = ("%s, %02d." % (self.shortdays[weekday], when.day), self.weekdays[weekday], self.shortdays[weekday], when.isoformat())
+		return fields
+
+
+class WIreducer:  # table-driven reduced view: each output field is (key, path, format), the tables are compiled once per provider
+	SKIP = object()  # value of optional fields, they are left out of the output
+	FORMATS = {None: None,
+			"int": "%.0f".__mod__,
+			"str": str,
+			"iso": datetime.isoformat,
+			"km": lambda value: "%.0f" % round(value / 1000),
+			"kmh": lambda value: "%.0f" % (value * 3.6),
+			"round": lambda value: str(round(value)),
+			"strip": str.strip,
+			"dirsign": lambda degree: "." if degree < 0 else ["↓ N", "↙ NE", "← E", "↖ SE", "↑ S", "↗ SW", "→ W", "↘ NW"][int(round(degree % 360 / 45 % 7.5))],
+			"intdirsign": lambda degree: WIreducer.FORMATS["dirsign"](int(degree))
+			}
+	TABLES = {"msn": {"header": [("source", "=MSN Weather"), ("name", "name"), ("longitude", "source.coordinates.lon", "str"), ("latitude", "source.coordinates.lat", "str"),
+								("pressunit", "units.pressure"), ("tempunit", "tempunit"), ("windunit", "units.speed"), ("precunit", "=%"), ("uvindexunit", "="), ("visibiliyunit", "units.distance")],
+					"current": [("observationPoint", "fullname"), ("observationTime", "currdate", "iso"), ("sunrise", "sunrise", "iso"), ("sunset", "sunset", "iso"),
+								("moonrise", "moonrise", "iso"), ("moonset", "moonset", "iso"), ("isNight", "isNight"), ("ProviderCode", "code"), ("yahooCode", "yahooCode"), ("meteoCode", "meteoCode"),
+								("pressure", "current.baro", "int"), ("temp", "current.temp", "int"), ("feelsLike", "current.feels", "int"), ("humidity", "current.rh", "int"),
+								("windSpeed", "current.windSpd", "int"), ("windDir", "current.windDir", "str"), ("windDirSign", "current.windDir", "dirsign"), ("windGusts", "current.windGust", "int"),
+								("uvIndex", "current.uv", "int"), ("visibility", "current.vis", "int"), ("maxTemp", "today.daily.tempHi", "int"), ("minTemp", "today.daily.tempLo", "int"),
+								("precipitation", "today.daily.day.precip", "int"), ("dayText", "dates.0"), ("day", "dates.1"), ("shortDay", "dates.2"),
+								("date", "dates.3"), ("text", "text"), ("raintext", "raintext")],
+					"forecast": [("ProviderCode", "day.daily.symbol"), ("yahooCode", "yahooCode"), ("meteoCode", "meteoCode"), ("pressure", "day.daily.baro", "int"),
+								("minTemp", "day.daily.tempLo", "int"), ("maxTemp", "day.daily.tempHi", "int"), ("maxFeelsLike", "day.daily.feelsHi", "int"), ("minFeelsLike", "day.daily.feelsLo", "int"),
+								("maxWindSpeed", "day.daily.windMax", "int"), ("domWindDir", "day.daily.windMaxDir", "int"), ("domWindDirSign", "day.daily.windMaxDir", "dirsign"),
+								("maxWindGusts", "day.daily.windTh", "int"), ("maxUvIndex", "day.daily.uv", "int"), ("maxVisibility", "day.daily.vis", "int"), ("precipitation", "day.daily.day.precip", "int"),
+								("dayText", "dates.0"), ("day", "dates.1"), ("shortDay", "dates.2"), ("date", "dates.3"), ("text", "day.daily.pvdrCap"),
+								("daySummary0", "day.daily.day.summaries.0", "strip"), ("daySummary1", "daySummary1"), ("nightSummary0", "day.daily.night.summaries.0", "strip"),
+								("nightSummary1", "nightSummary1"), ("umbrellaIndex", "umbrellaIndex")]
+					},
+			"omw": {"header": [("source", "=Open-Meteo Weather"), ("name", "name"), ("longitude", "info.longitude", "str"), ("latitude", "info.latitude", "str"), ("pressunit", "=mbar"),
+								("tempunit", "info.hourly_units.temperature_2m"), ("windunit", "info.hourly_units.windspeed_10m"), ("precunit", "info.hourly_units.precipitation_probability"),
+								("uvindexunit", "info.hourly_units.uv_index"), ("visibiliyunit", "visunit")],
+					"current": [("observationPoint", "fullname"), ("observationTime", "observationTime"), ("sunrise", "sunrise", "iso"), ("sunset", "sunset", "iso"), ("isNight", "isNight"),
+								("ProviderCode", "info.hourly.weathercode.#", "str"), ("yahooCode", "yahooCode"), ("meteoCode", "meteoCode"), ("pressure", "info.current.pressure_msl", "int"),
+								("temp", "info.hourly.temperature_2m.0", "int"), ("feelsLike", "info.hourly.apparent_temperature.#", "int"), ("humidity", "info.hourly.relativehumidity_2m.#", "int"),
+								("windSpeed", "info.hourly.windspeed_10m.#", "int"), ("windDir", "info.hourly.winddirection_10m.#", "str"), ("windDirSign", "info.hourly.winddirection_10m.#", "dirsign"),
+								("windGusts", "info.hourly.wind_gusts_10m.#", "int"), ("uvIndex", "info.hourly.uv_index.#", "int"), ("visibility", "info.hourly.visibility.#", "km"), ("dayText", "dates.0"),
+								("day", "dates.1"), ("shortDay", "dates.2"), ("date", "dates.3"), ("maxTemp", "info.daily.temperature_2m_max.0", "int"),
+								("minTemp", "info.daily.temperature_2m_min.0", "int"), ("precipitation", "info.hourly.precipitation_probability.#", "int")],
+					"forecast": [("ProviderCode", "info.daily.weathercode.#", "str"), ("yahooCode", "yahooCode"), ("meteoCode", "meteoCode"), ("pressure", "pressure", "int"),
+								("minTemp", "info.daily.temperature_2m_min.#", "int"), ("maxTemp", "info.daily.temperature_2m_max.#", "int"), ("maxFeelsLike", "info.daily.apparent_temperature_max.#", "int"),
+								("minFeelsLike", "info.daily.apparent_temperature_min.#", "int"), ("maxWindSpeed", "info.daily.wind_speed_10m_max.#", "int"), ("domWindDir", "info.daily.wind_direction_10m_dominant.#", "int"),
+								("domWindDirSign", "info.daily.wind_direction_10m_dominant.#", "dirsign"), ("maxWindGusts", "info.daily.wind_gusts_10m_max.#", "int"), ("maxUvIndex", "info.daily.uv_index_max.#", "int"),
+								("maxVisibility", "maxvisibility", "km"), ("precipitation", "info.daily.precipitation_probability_max.#", "int"), ("dayText", "dates.0"), ("day", "dates.1"),
+								("shortDay", "dates.2"), ("date", "dates.3")]
+					},
+			"owm": {"header": [("source", "=OpenWeatherMap"), ("name", "name"), ("longitude", "info.city.coord.lon", "str"), ("latitude", "info.city.coord.lat", "str"), ("pressunit", "=mbar"),
+								("tempunit", "tempunit"), ("windunit", "windunit"), ("precunit", "=%"), ("visibiliyunit", "visunit")],
+					"current": [("observationPoint", "fullname"), ("observationTime", "currdate", "iso"), ("sunrise", "sunrise", "iso"), ("sunset", "sunset", "iso"), ("isNight", "isNight"),
+								("ProviderCode", "info.weather.0.id", "str"), ("yahooCode", "yahooCode"), ("meteoCode", "meteoCode"), ("pressure", "pressure"), ("temp", "info.main.temp", "int"),
+								("feelsLike", "info.main.feels_like", "int"), ("humidity", "info.main.humidity", "int"), ("windSpeed", "info.wind.speed", "kmh"), ("windDir", "info.wind.deg", "str"),
+								("windDirSign", "info.wind.deg", "intdirsign"), ("windGusts", "info.list.0.wind.gust", "int"), ("visibility", "info.visibility", "km"), ("dayText", "dates.0"),
+								("day", "dates.1"), ("shortDay", "dates.2"), ("date", "dates.3"), ("text", "info.weather.0.description"),
+								("minTemp", "mintemp", "round"), ("maxTemp", "maxtemp", "round"), ("precipitation", "precipitation")],
+					"forecast": [("ProviderCode", "code"), ("yahooCode", "yahooCode"), ("meteoCode", "meteoCode"), ("pressure", "pressure", "int"), ("minTemp", "tmin", "int"),
+								("maxTemp", "tmax", "int"), ("maxFeelsLike", "fmin", "int"), ("minFeelsLike", "fmax", "int"), ("maxWindSpeed", "wmax", "int"), ("domWindDir", "wdom", "int"),
+								("domWindDirSign", "wdom", "dirsign"), ("maxWindGusts", "gmax", "int"), ("maxVisibility", "vmax", "int"), ("precipitation", "precipitation"),
+								("dayText", "dates.0"), ("day", "dates.1"), ("shortDay", "dates.2"), ("date", "dates.3"), ("text", "text")]
+					}
+			}  # paths are dotted keys into the context of a provider (see Weatherinfo.*context), "#" = the index given by the context, "=" = literal value
+	compiled = {}  # (mode, part): function context -> dict, generated from the table
+
+	@classmethod
+	def table(cls, mode, part):
+		fill = cls.compiled.get((mode, part))
+		if fill is None:
+			fill = cls.compiled[(mode, part)] = cls.compile(cls.TABLES[mode][part])
+		return fill
+
+	@classmethod
+	def compile(cls, table):  # turns a table into the source of a function with one plain assignment per field
+		fields = [(field[0], field[1], field[2] if len(field) > 2 else None) for field in table]
+		counts = {}
+		for key, path, fmt in fields:
+			keys = cls.keys(path)
+			for length in range(1, len(keys)):
+				counts[keys[:length]] = counts.get(keys[:length], 0) + 1
+		lines, names, namespace = ["def fill(context):", "\tresult = {}"], {}, {"SKIP": cls.SKIP}
+		if any("#" in cls.keys(path) for key, path, fmt in fields):
+			lines.append("\tindex = context['#']")
+		for prefix, count in counts.items():  # lookups shared by several fields are done once
+			if count > 1:
+				names[prefix] = "p%s" % len(names)
+				lines.append("\t%s = %s" % (names[prefix], cls.expression(prefix, names)))
+		for idx, (key, path, fmt) in enumerate(fields):
+			if path.startswith("="):
+				namespace["L%s" % idx] = path[1:]
+				value = "L%s" % idx
+			else:
+				value = cls.expression(cls.keys(path), names)
+			if fmt == "int":
+				formatted = "\"%%.0f\" %% %s"
+			elif fmt == "str":
+				formatted = "str(%s)"
+			elif fmt == "iso":
+				formatted = "%s.isoformat()"
+			elif fmt:
+				namespace["F%s" % idx] = cls.FORMATS[fmt]
+				formatted = "F%s(%%s)" % idx
+			else:
+				formatted = "%s"
+			if len(cls.keys(path)) == 1:  # values of the context may be SKIP
+				lines += ["\tvalue = %s" % value, "\tif value is not SKIP:", "\t\tresult[%r] = %s" % (key, formatted % "value")]
+			else:
+				lines.append("\tresult[%r] = %s" % (key, formatted % value))
+		lines.append("\treturn result")
+		exec("\n".join(lines), namespace)
+		return namespace["fill"]
+
+	@staticmethod
+	def keys(path):
+		return () if path.startswith("=") else tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+	@staticmethod
+	def expression(keys, names):  # source of the lookup, starts from the longest shared lookup
+		for length in range(len(keys) - 1, 0, -1):
+			if keys[:length] in names:
+				return names[keys[:length]] + "".join("[index]" if key == "#" else "[%r]" % key for key in keys[length:])
+		return "context" + "".join("[index]" if key == "#" else "[%r]" % key for key in keys)
+
+	@classmethod
+	def reduce(cls, mode, header, current, days):  # contexts of a provider -> reduced view
+		reduced = cls.table(mode, "header")(header)
+		reduced["current"] = cls.table(mode, "current")(current) if current else {}
+		forecast = cls.table(mode, "forecast")
+		reduced["forecast"] = {idx: forecast(day) for idx, day in days.items()}
+		return reduced
+
+
+class WIflight:  # single-flight: identical requests in progress share one upstream fetch and one reduction
+	flights = {}  # flightkey: WIflight
+	flightslock = Lock()
+
+	def __init__(self, key):
+		self.key = key
+		self.info, self.error = None, None
+		self.mode = key[0]  # source of the info, differs from the requested one after a fallback
+		self.done = Event()
+		self.lock = Lock()
+		self.reduced = {}  # (geodata, units, scheme): (result, error)
+		self.waiters = []  # [(instance, request), ...] delivered by the leader when the flight has landed
+
+	@classmethod
+	def board(cls, key):  # returns (flight, True) for the leader who has to fetch, (flight, False) for followers
+		with cls.flightslock:
+			flight = cls.flights.get(key)
+			if flight:
+				return flight, False
+			flight = cls.flights[key] = cls(key)
+			return flight, True
+
+	@classmethod
+	def join(cls, key, instance, req):  # callback requests wait for a flight in progress without an own thread
+		with cls.flightslock:
+			flight = cls.flights.get(key)
+			if flight:
+				flight.waiters.append((instance, req))
+			return flight is not None
+
+	def land(self, info, error, mode):
+		with self.flightslock:
+			self.flights.pop(self.key, None)
+			waiters, self.waiters = self.waiters, []
+		self.info, self.error, self.mode = info, error, mode
+		self.done.set()
+		return waiters
+
+	def reduce(self, instance, req):
+		key = (tuple(req.geodata), req.units, req.scheme)
+		with self.lock:
+			if key not in self.reduced:
+				result = instance.getreducedinfo(req)
+				self.reduced[key] = (result, req.error)
+			return self.reduced[key]
+
+
+class WIscheduler:  # background refresh of subscribed locations: jittered intervals, no fetch before the provider can have new data
+	CADENCES = {"msn": 900, "omw": 900, "owm": 600}  # seconds between two updates of the provider data
+
+	def __init__(self, weatherinfo, interval=1800, jitter=0.1, spread=5, retry=300, workers=4):
+		self.weatherinfo = weatherinfo  # Weatherinfo instance doing the fetches, its mode applies to all subscriptions
+		self.interval = interval  # seconds between two refreshes of a location
+		self.jitter = jitter  # +/- fraction of the interval, so that subscriptions made together drift apart
+		self.spread = spread  # the first refreshes of new subscriptions are spread over this number of seconds
+		self.retry = retry  # seconds until a failed refresh is repeated
+		self.workers = workers
+		self.subscriptions = {}  # (geodata, units, scheme, reduced): {"callbacks", "due", "observed", "result", ...}
+		self.queue = []  # heap of (due, sequence, key), outdated items are skipped
+		self.sequence = 0
+		self.lock = Lock()
+		self.wakeup = Event()
+		self.thread, self.executor = None, None
+		self.stopped = False
+		self.refreshes, self.deferrals, self.unchanged = 0, 0, 0
+
+	def subscribe(self, geodata, callback, units="metric", scheme="de-de", reduced=False):  # callback(data, error) like 'Weatherinfo.start', returns the key of the subscription
+		key = (tuple(geodata), units.lower(), scheme.lower(), reduced)
+		with self.lock:
+			entry = self.subscriptions.get(key)
+			if entry is None:
+				entry = self.subscriptions[key] = {"callbacks": [], "due": 0, "observed": None, "result": None, "running": False}
+				self.schedule(key, entry, time() + uniform(0, self.spread))
+			entry["callbacks"].append(callback)
+			result = entry["result"]
+		self.start()
+		if result is not None:  # latest data right away, the next refresh follows the schedule
+			self.executor.submit(callback, result, None)
+		return key
+
+	def unsubscribe(self, key, callback=None):  # callback None = remove all callbacks of the subscription
+		with self.lock:
+			entry = self.subscriptions.get(key)
+			if entry and callback in entry["callbacks"]:
+				entry["callbacks"].remove(callback)
+			if entry and (callback is None or not entry["callbacks"]):
+				del self.subscriptions[key]
+
+	def schedule(self, key, entry, due):  # call with lock held
+		entry["due"] = due
+		self.sequence += 1
+		heappush(self.queue, (due, self.sequence, key))
+		self.wakeup.set()
+
+	def start(self):
+		with self.lock:
+			if self.thread is None:
+				from concurrent.futures import ThreadPoolExecutor
+				from threading import Thread
+				self.stopped = False
+				self.executor = ThreadPoolExecutor(max_workers=self.workers)
+				self.thread = Thread(target=self.run, name="WIscheduler", daemon=True)
+				self.thread.start()
+
+	def stop(self):  # refreshes in progress are finished, but deliver no more
+		with self.lock:
+			thread, executor = self.thread, self.executor
+			self.thread, self.stopped = None, True
+			self.wakeup.set()
+		if thread:
+			thread.join()
+			executor.shutdown(wait=False)
+
+	def run(self):
+		while True:
+			self.wakeup.clear()
+			due = []
+			with self.lock:
+				if self.stopped:
+					return
+				now = time()
+				while self.queue and self.queue[0][0] <= now:
+					when, sequence, key = heappop(self.queue)
+					entry = self.subscriptions.get(key)
+					if entry and entry["due"] == when and not entry["running"]:
+						entry["running"] = True
+						due.append((key, entry))
+				wait = self.queue[0][0] - now if self.queue else None
+			for key, entry in due:
+				self.executor.submit(self.refresh, key, entry)
+			self.wakeup.wait(wait)
+
+	def refresh(self, key, entry):
+		WI = self.weatherinfo
+		geodata, units, scheme, reduced = key
+		req = WIrequest(WI.mode, geodata, units, scheme, reduced)
+		req.error = WI.checkrequest(req, "WIscheduler") or (None if WI.parser else "[%s] ERROR in module 'WIscheduler': unknown mode '%s'." % (wiglobals.MODULE_NAME, WI.mode))
+		if not req.error:
+			try:
+				WI.parser(req)
+			except Exception as err:  # the subscription must not get stuck as 'running': the error takes the retry path and is called back
+				req.result, req.error = None, "[%s] ERROR in module 'WIscheduler': %s" % (wiglobals.MODULE_NAME, str(err) or err.__class__.__name__)
+		now = time()
+		observed = None if req.error else self.observed(req.mode, req.info)
+		changed = req.error or observed is None or observed != entry["observed"]
+		deferred = False
+		if req.error:
+			due = now + self.retry
+		else:
+			due = now + self.interval * uniform(1 - self.jitter, 1 + self.jitter)
+			if observed is not None and min(observed, now) + self.CADENCES.get(req.mode, 0) > due:  # provider has no newer data until then
+				due = min(observed, now) + self.CADENCES[req.mode] + uniform(0, self.spread)
+				deferred = True
+			session = WI.session or WIsession.shared()
+			fresh = max([session.expires(link, params, WI.selector(req)) for link, params, cachekey in WI.requestlinks(req)] or [0])
+			if fresh > due:  # 'Cache-Control: max-age' of the provider
+				due = fresh + uniform(0, self.spread)
+				deferred = True
+		with self.lock:
+			entry["running"] = False
+			self.refreshes += 1
+			self.deferrals += deferred
+			if not req.error:
+				entry["observed"], entry["result"] = observed, req.result
+			if not changed:
+				self.unchanged += 1
+			if self.subscriptions.get(key) is not entry or self.stopped:
+				return
+			self.schedule(key, entry, due)
+			callbacks = list(entry["callbacks"]) if changed else []
+		for callback in callbacks:
+			callback(None if req.error else req.result, req.error)
+
+	def observed(self, mode, info):  # observation time of the provider data in epoch seconds, None = unknown
+		try:
+			if mode == "msn":
+				return datetime.fromisoformat(info["responses"][0]["weather"][0]["current"]["created"]).timestamp()
+			if mode == "omw" and "utc_offset_seconds" in info:  # local time of the location
+				return datetime.fromisoformat(info["current"]["time"]).replace(tzinfo=timezone.utc).timestamp() - info.get("utc_offset_seconds", 0)
+			if mode == "owm":
+				return float(info["dt"])
+		except (KeyError, IndexError, TypeError, ValueError):
+			return None
+
+
+def iconindex(sources):  # immutable lookup source -> code -> {"yahooCode", "meteoCode"}, numeric codes are found as int too
+	index = {}
+	for src, codes in sources.items():
+		table = {}
+		for code, (yahoo, meteo) in codes.items():
+			table[code] = MappingProxyType({"yahooCode": yahoo, "meteoCode": meteo})
+			if code.isdigit():
+				table[int(code)] = table[code]
+			if src == "msn":
+				table["%s1" % code] = table[code]  # with 'windy'-flag
+		index[src] = MappingProxyType(table)
+	return MappingProxyType(index)
+
+
 class Weatherinfo:
-	def __init__(self, newmode="msn", apikey=None):
-
-		self.msnCodes = {
-			"d000": ("32", "B"), "d100": ("34", "B"), "d200": ("30", "H"), "d210": ("12", "Q"),
-			"d211": ("5", "W"), "d212": ("14", "V"), "d220": ("11", "Q"), "d221": ("42", "V"),
-			"d222": ("16", "W"), "d240": ("4", "0"), "d300": ("28", "H"), "d310": ("11", "Q"),
-			"d311": ("5", "W"), "d312": ("14", "V"), "d320": ("39", "R"), "d321": ("5", "W"),
-			"d322": ("16", "W"), "d340": ("4", "0"), "d400": ("26", "Y"), "d410": ("9", "Q"),
-			"d411": ("5", "W"), "d412": ("14", "V"), "d420": ("9", "Q"), "d421": ("5", "W"),
-			"d422": ("16", "W"), "d430": ("12", "Q"), "d431": ("5", "W"), "d432": ("15", "W"),
-			"d440": ("4", "0"), "d500": ("28", "H"), "d600": ("20", "E"), "d603": ("10", "U"),
-			"d605": ("17", "X"), "d705": ("17", "X"), "d900": ("21", "M"), "d905": ("17", "X"),
-			"d907": ("21", "M"),
-			"n000": ("31", "C"), "n100": ("33", "C"), "n200": ("29", "I"), "n210": ("45", "Q"),
-			"n211": ("5", "W"), "n212": ("46", "W"), "n220": ("45", "Q"), "n221": ("5", "W"),
-			"n222": ("46", "W"), "n240": ("47", "Z"), "n300": ("27", "I"), "n310": ("45", "Q"),
-			"n311": ("11", "Q"), "n312": ("46", "W"), "n320": ("45", "R"), "n321": ("5", "W"),
-			"n322": ("46", "W"), "n340": ("47", "Z"), "n400": ("26", "Y"), "n410": ("9", "Q"),
-			"n411": ("5", "W"), "n412": ("14", "V"), "n420": ("9", "Q"), "n421": ("5", "W"),
-			"n422": ("14", "W"), "n430": ("12", "Q"), "n431": ("5", "W"), "n432": ("15", "W"),
-			"n440": ("4", "0"), "n500": ("29", "I"), "n600": ("20", "E"), "n603": ("10", "U"),
-			"n605": ("17", "X"), "n705": ("17", "X"), "n900": ("21", "M"), "n905": ("17", "X"),
-			"n907": ("21", "M")  # "xxxx1": "WindyV2"
-			}  # mapping: msn -> (yahoo, meteo)
-		self.omwCodes = {
-			"0": ("32", "B"), "1": ("34", "B"), "2": ("30", "H"), "3": ("28", "N"), "45": ("20", "M"),
-			"48": ("21", "J"), "51": ("9", "Q"), "53": ("9", "Q"), "55": ("9", "R"), "56": ("8", "V"),
-			"57": ("10", "U"), "61": ("11", "Q"), "63": ("12", "R"), "65": ("12", "R"), "66": ("8", "R"),
-			"67": ("7", "W"), "71": ("42", "V"), "73": ("14", "U"), "75": ("41", "W"), "77": ("35", "X"),
-			"80": ("11", "Q"), "81": ("12", "R"), "82": ("12", "R"), "85": ("42", "V"), "86": ("43", "W"),
-			"95": ("38", "P"), "96": ("4", "O"), "99": ("4", "Z")
-			}  # mapping: omw -> (yahoo, meteo)
-		self.owmCodes = {
-			"200": ("37", "O"), "201": ("4", "O"), "202": ("3", "P"), "210": ("37", "O"), "211": ("4", "O"),
-			"212": ("3", "P"), "221": ("3", "O"), "230": ("37", "O"), "231": ("38", "O"), "232": ("38", "O"),
-			"300": ("9", "Q"), "301": ("9", "Q"), "302": ("9", "Q"), "310": ("9", "Q"), "311": ("9", "Q"),
-			"312": ("9", "R"), "313": ("11", "R"), "314": ("12", "R"), "321": ("11", "R"), "500": ("9", "Q"),
-			"501": ("11", "Q"), "502": ("11", "R"), "503": ("12", "R"), "504": ("12", "R"), "511": ("10", "W"),
-			"520": ("11", "Q"), "521": ("11", "R"), "522": ("12", "R"), "531": ("40", "Q"), "600": ("42", "U"),
-			"601": ("16", "V"), "602": ("15", "V"), "611": ("18", "X"), "612": ("10", "W"), "613": ("17", "X"),
-			"615": ("6", "W"), "616": ("5", "W"), "620": ("14", "U"), "621": ("42", "U"), "622": ("13", "V"),
-			"701": ("20", "M"), "711": ("22", "J"), "721": ("21", "E"), "731": ("19", "J"), "741": ("20", "E"),
-			"751": ("19", "J"), "761": ("19", "J"), "762": ("22", "J"), "771": ("23", "F"), "781": ("0", "F"),
-			"800": ("32", "B"), "801": ("34", "B"), "802": ("30", "H"), "803": ("26", "H"), "804": ("28", "N")
-			}  # mapping: owm -> (yahoo, meteo), OpenWeatherMap is DEPRECATED
-		self.msnDescs = {
-			"d000": "SunnyDayV3", "d100": "MostlySunnyDay", "d200": "D200PartlySunnyV2", "d210": "D210LightRainShowersV2",
-			"d211": "D211LightRainSowShowersV2", "d212": "D212LightSnowShowersV2", "d220": "LightRainShowerDay",
-			"d221": "D221RainSnowShowersV2", "d222": "SnowShowersDayV2", "d240": "D240TstormsV2",
-			"d300": "MostlyCloudyDayV2", "d310": "D310LightRainShowersV2", "d311": "D311LightRainSnowShowersV2",
-			"d312": "LightSnowShowersDay", "d320": "RainShowersDayV2", "d321": "D321RainSnowShowersV2",
-			"d322": "SnowShowersDayV2", "d340": "D340TstormsV2", "d400": "CloudyV3", "d410": "LightRainV3",
-			"d411": "RainSnowV2", "d412": "LightSnowV2", "d420": "HeavyDrizzle", "d421": "RainSnowV2", "d422": "Snow",
-			"d430": "ModerateRainV2", "d431": "RainSnowV2", "d432": "HeavySnowV2", "d440": "ThunderstormsV2",
-			"d500": "MostlyCloudyDayV2", "d600": "FogV2", "d603": "FreezingRainV2", "d605": "IcePelletsV2",
-			"d705": "BlowingHailV2", "d900": "Haze", "d905": "BlowingHailV2", "d907": "Haze",
-			"n000": "ClearNightV3", "n100": "MostlyClearNight", "n200": "PartlyCloudyNightV2",
-			"n210": "N210LightRainShowersV2", "n211": "N211LightRainSnowShowersV2", "n212": "N212LightSnowShowersV2",
-			"n220": "LightRainShowerNight", "n221": "N221RainSnowShowersV2", "n222": "N222SnowShowersV2",
-			"n240": "N240TstormsV2", "n300": "MostlyCloudyNightV2", "n310": "N310LightRainShowersV2",
-			"n311": "N311LightRainSnowShowersV2", "n312": "LightSnowShowersNight", "n320": "RainShowersNightV2",
-			"n321": "N321RainSnowShowersV2", "n322": "N322SnowShowersV2", "n340": "N340TstormsV2", "n400": "CloudyV3",
-			"n410": "LightRainV3", "n411": "RainSnowV2", "n412": "LightSnowV2", "n420": "HeavyDrizzle",
-			"n421": "RainSnowShowersNightV2", "n422": "N422SnowV2", "n430": "ModerateRainV2",
-			"n431": "RainSnowV2", "n432": "HeavySnowV2", "n440": "ThunderstormsV2", "n500": "PartlyCloudyNightV2",
-			"n600": "FogV2", "n603": "FreezingRainV2", "n605": "BlowingHailV2", "n705": "BlowingHailV2",
-			"n905": "BlowingHailV2", "n907": "Haze", "n900": "Haze"  # "xxxx1": "WindyV2"
-			}  # cleartext description of msn-weathercodes
-		self.omwDescs = {
-			"0": "clear sky", "1": "mainly clear", "2": "partly cloudy", "3": "overcast", "45": "fog", "48": "depositing rime fog", "51": "light drizzle",
-			"53": "moderate drizzle", "55": "dense intensity drizzle", "56": "light freezing drizzle", "57": "dense intensity freezing drizzle",
-			"61": "slight rain", "63": "moderate rain", "65": "heavy intensity rain", "66": "light freezing rain", "67": "heavy intensity freezing rain",
-			"71": "slight snow fall", "73": "moderate snow fall", "75": "heavy intensity snow fall", "77": "snow grains", "80": "slight rain showers",
-			"81": "moderate rain showers", "82": "violent rain showers", "85": "slight snow showers", "86": "heavy snow showers",
-			"95": "slight or moderate thunderstorm", "96": "thunderstorm with slight hail", "99": "thunderstorm with heavy hail"
-			}  # cleartext description of omw-weathercodes
-		self.owmDescs = {
-			"200": "thunderstorm with light rain", "201": "thunderstorm with rain", "202": "thunderstorm with heavy rain",
-			"210": "light thunderstorm", "211": "thunderstorm", "212": "heavy thunderstorm", "221": "ragged thunderstorm",
-			"230": "thunderstorm with light drizzle", "231": "thunderstorm with drizzle", "232": "thunderstorm with heavy drizzle",
-			"300": "light intensity drizzle", "301": "drizzle", "302": "heavy intensity drizzle", "310": "light intensity drizzle rain",
-			"311": "drizzle rain", "312": "heavy intensity drizzle rain", "313": "shower rain and drizzle", "314": "heavy shower rain and drizzle",
-			"321": "shower drizzle", "500": "light rain", "501": "moderate rain", "502": "heavy intensity rain", "503": "very heavy rain",
-			"504": "extreme rain", "511": "freezing rain", "520": "light intensity shower rain", "521": "shower rain", "522": "heavy intensity shower rain",
-			"531": "ragged shower rain", "600": "light snow", "601": "Snow", "602": "Heavy snow", "611": "Sleet", "612": "Light shower sleet",
-			"613": "Shower sleet", "615": "Light rain and snow", "616": "Rain and snow", "620": "Light shower snow", "621": "Shower snow",
-			"622": "Heavy shower snow", "701": "mist", "711": "Smoke", "721": "Haze", "731": "sand/ dust whirls", "741": "fog", "751": "sand",
-			"761": "dust", "762": "volcanic ash", "771": "squalls", "781": "tornado", "800": "clear sky", "801": "few clouds: 11-25%",
-			"802": "scattered clouds: 25-50%", "803": "broken clouds: 51-84%", "804": "overcast clouds: 85-100%"
-			}  # cleartext description of owm-weathercodes, OpenWeatherMap is DEPRECATED
-		self.yahooDescs = {
-			"0": "tornado", "1": "tropical storm", "2": "hurricane", "3": "severe thunderstorms", "4": "thunderstorms", "5": "mixed rain and snow",
-			"6": "mixed rain and sleet", "7": "mixed snow and sleet", "8": "freezing drizzle", "9": "drizzle", "10": "freezing rain",
-			"11": "showers (light)", "12": "showers (heavier)", "13": "snow flurries", "14": "light snow showers", "15": "blowing snow", "16": "snow",
-			"17": "hail", "18": "sleet", "19": "dust", "20": "foggy", "21": "haze", "22": "smoky", "23": "blustery", "24": "windy", "25": "cold",
-			"26": "cloudy", "27": "mostly cloudy (night)", "28": "mostly cloudy (day)", "29": "partly cloudy (night)", "30": "partly cloudy (day)",
-			"31": "clear (night)", "32": "sunny (day)", "33": "fair (night)", "34": "fair (day)", "35": "mixed rain and hail", "36": "hot",
-			"37": "isolated thunderstorms", "38": "scattered thunderstorms", "39": "capricious weather", "40": "scattered showers",
-			"41": "heavy snow", "42": "scattered snow showers", "43": "heavy snow", "44": "partly cloudy", "45": "rain showers (night)",
-			"46": "snow showers (night)", "47": "thundershowers (night)", "NA": "not available"
-			}  # cleartext description of modified yahoo-iconcodes
-		self.meteoDescs = {
-			"!": "windy_rain_inv", "\"": "snow_inv", "#": "snow_heavy_inv", "$": "hail_inv", "%": "clouds_inv", "&": "clouds_flash_inv", "'": "temperature",
-			"(": "compass", ")": "na", "*": "celcius", "+": "fahrenheit", "0": "clouds_flash_alt", "1": "sun_inv", "2": "moon_inv", "3": "cloud_sun_inv",
-			"4": "cloud_moon_inv", "5": "cloud_inv", "6": "cloud_flash_inv", "7": "drizzle_inv", "8": "rain_inv", "9": "windy_inv", "A": "sunrise",
-			"B": "sun", "C": "moon", "D": "eclipse", "E": "mist", "F": "wind", "G": "snowflake", "H": "cloud_sun", "I": "cloud_moon", "J": "fog_sun",
-			"K": "fog_moon", "L": "fog_cloud", "M": "fog", "N": "cloud", "O": "cloud_flash", "P": "cloud_flash_alt", "Q": "drizzle", "R": "rain",
-			"S": "windy", "T": "windy_rain", "U": "snow", "V": "snow_alt", "W": "snow_heavy", "X": "hail", "Y": "clouds", "Z": "clouds_flash"
-			}  # cleartext description of modified meteo-iconcodes
-		agents = [
-				"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.10 Safari/605.1.1",
-				"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.3",
-				"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.3",
-				"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 Trailer/93.3.8652.5",
-				"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 Edg/134.0.0.",
-				"Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0"
-				]
-		self.headers = {"User-Agent": choice(agents), 'Accept': 'application/json'}
+	msnCodes = MappingProxyType({
+		"d000": ("32", "B"), "d100": ("34", "B"), "d200": ("30", "H"), "d210": ("12", "Q"),
+		"d211": ("5", "W"), "d212": ("14", "V"), "d220": ("11", "Q"), "d221": ("42", "V"),
+		"d222": ("16", "W"), "d240": ("4", "0"), "d300": ("28", "H"), "d310": ("11", "Q"),
+		"d311": ("5", "W"), "d312": ("14", "V"), "d320": ("39", "R"), "d321": ("5", "W"),
+		"d322": ("16", "W"), "d340": ("4", "0"), "d400": ("26", "Y"), "d410": ("9", "Q"),
+		"d411": ("5", "W"), "d412": ("14", "V"), "d420": ("9", "Q"), "d421": ("5", "W"),
+		"d422": ("16", "W"), "d430": ("12", "Q"), "d431": ("5", "W"), "d432": ("15", "W"),
+		"d440": ("4", "0"), "d500": ("28", "H"), "d600": ("20", "E"), "d603": ("10", "U"),
+		"d605": ("17", "X"), "d705": ("17", "X"), "d900": ("21", "M"), "d905": ("17", "X"),
+		"d907": ("21", "M"),
+		"n000": ("31", "C"), "n100": ("33", "C"), "n200": ("29", "I"), "n210": ("45", "Q"),
+		"n211": ("5", "W"), "n212": ("46", "W"), "n220": ("45", "Q"), "n221": ("5", "W"),
+		"n222": ("46", "W"), "n240": ("47", "Z"), "n300": ("27", "I"), "n310": ("45", "Q"),
+		"n311": ("11", "Q"), "n312": ("46", "W"), "n320": ("45", "R"), "n321": ("5", "W"),
+		"n322": ("46", "W"), "n340": ("47", "Z"), "n400": ("26", "Y"), "n410": ("9", "Q"),
+		"n411": ("5", "W"), "n412": ("14", "V"), "n420": ("9", "Q"), "n421": ("5", "W"),
+		"n422": ("14", "W"), "n430": ("12", "Q"), "n431": ("5", "W"), "n432": ("15", "W"),
+		"n440": ("4", "0"), "n500": ("29", "I"), "n600": ("20", "E"), "n603": ("10", "U"),
+		"n605": ("17", "X"), "n705": ("17", "X"), "n900": ("21", "M"), "n905": ("17", "X"),
+		"n907": ("21", "M")  # "xxxx1": "WindyV2"
+		})  # mapping: msn -> (yahoo, meteo)
+	omwCodes = MappingProxyType({
+		"0": ("32", "B"), "1": ("34", "B"), "2": ("30", "H"), "3": ("28", "N"), "45": ("20", "M"),
+		"48": ("21", "J"), "51": ("9", "Q"), "53": ("9", "Q"), "55": ("9", "R"), "56": ("8", "V"),
+		"57": ("10", "U"), "61": ("11", "Q"), "63": ("12", "R"), "65": ("12", "R"), "66": ("8", "R"),
+		"67": ("7", "W"), "71": ("42", "V"), "73": ("14", "U"), "75": ("41", "W"), "77": ("35", "X"),
+		"80": ("11", "Q"), "81": ("12", "R"), "82": ("12", "R"), "85": ("42", "V"), "86": ("43", "W"),
+		"95": ("38", "P"), "96": ("4", "O"), "99": ("4", "Z")
+		})  # mapping: omw -> (yahoo, meteo)
+	owmCodes = MappingProxyType({
+		"200": ("37", "O"), "201": ("4", "O"), "202": ("3", "P"), "210": ("37", "O"), "211": ("4", "O"),
+		"212": ("3", "P"), "221": ("3", "O"), "230": ("37", "O"), "231": ("38", "O"), "232": ("38", "O"),
+		"300": ("9", "Q"), "301": ("9", "Q"), "302": ("9", "Q"), "310": ("9", "Q"), "311": ("9", "Q"),
+		"312": ("9", "R"), "313": ("11", "R"), "314": ("12", "R"), "321": ("11", "R"), "500": ("9", "Q"),
+		"501": ("11", "Q"), "502": ("11", "R"), "503": ("12", "R"), "504": ("12", "R"), "511": ("10", "W"),
+		"520": ("11", "Q"), "521": ("11", "R"), "522": ("12", "R"), "531": ("40", "Q"), "600": ("42", "U"),
+		"601": ("16", "V"), "602": ("15", "V"), "611": ("18", "X"), "612": ("10", "W"), "613": ("17", "X"),
+		"615": ("6", "W"), "616": ("5", "W"), "620": ("14", "U"), "621": ("42", "U"), "622": ("13", "V"),
+		"701": ("20", "M"), "711": ("22", "J"), "721": ("21", "E"), "731": ("19", "J"), "741": ("20", "E"),
+		"751": ("19", "J"), "761": ("19", "J"), "762": ("22", "J"), "771": ("23", "F"), "781": ("0", "F"),
+		"800": ("32", "B"), "801": ("34", "B"), "802": ("30", "H"), "803": ("26", "H"), "804": ("28", "N")
+		})  # mapping: owm -> (yahoo, meteo), OpenWeatherMap is DEPRECATED
+	icons = iconindex({"msn": msnCodes, "omw": omwCodes, "owm": owmCodes})  # shared by all instances, read-only
+	msnDescs = MappingProxyType({
+		"d000": "SunnyDayV3", "d100": "MostlySunnyDay", "d200": "D200PartlySunnyV2", "d210": "D210LightRainShowersV2",
+		"d211": "D211LightRainSowShowersV2", "d212": "D212LightSnowShowersV2", "d220": "LightRainShowerDay",
+		"d221": "D221RainSnowShowersV2", "d222": "SnowShowersDayV2", "d240": "D240TstormsV2",
+		"d300": "MostlyCloudyDayV2", "d310": "D310LightRainShowersV2", "d311": "D311LightRainSnowShowersV2",
+		"d312": "LightSnowShowersDay", "d320": "RainShowersDayV2", "d321": "D321RainSnowShowersV2",
+		"d322": "SnowShowersDayV2", "d340": "D340TstormsV2", "d400": "CloudyV3", "d410": "LightRainV3",
+		"d411": "RainSnowV2", "d412": "LightSnowV2", "d420": "HeavyDrizzle", "d421": "RainSnowV2", "d422": "Snow",
+		"d430": "ModerateRainV2", "d431": "RainSnowV2", "d432": "HeavySnowV2", "d440": "ThunderstormsV2",
+		"d500": "MostlyCloudyDayV2", "d600": "FogV2", "d603": "FreezingRainV2", "d605": "IcePelletsV2",
+		"d705": "BlowingHailV2", "d900": "Haze", "d905": "BlowingHailV2", "d907": "Haze",
+		"n000": "ClearNightV3", "n100": "MostlyClearNight", "n200": "PartlyCloudyNightV2",
+		"n210": "N210LightRainShowersV2", "n211": "N211LightRainSnowShowersV2", "n212": "N212LightSnowShowersV2",
+		"n220": "LightRainShowerNight", "n221": "N221RainSnowShowersV2", "n222": "N222SnowShowersV2",
+		"n240": "N240TstormsV2", "n300": "MostlyCloudyNightV2", "n310": "N310LightRainShowersV2",
+		"n311": "N311LightRainSnowShowersV2", "n312": "LightSnowShowersNight", "n320": "RainShowersNightV2",
+		"n321": "N321RainSnowShowersV2", "n322": "N322SnowShowersV2", "n340": "N340TstormsV2", "n400": "CloudyV3",
+		"n410": "LightRainV3", "n411": "RainSnowV2", "n412": "LightSnowV2", "n420": "HeavyDrizzle",
+		"n421": "RainSnowShowersNightV2", "n422": "N422SnowV2", "n430": "ModerateRainV2",
+		"n431": "RainSnowV2", "n432": "HeavySnowV2", "n440": "ThunderstormsV2", "n500": "PartlyCloudyNightV2",
+		"n600": "FogV2", "n603": "FreezingRainV2", "n605": "BlowingHailV2", "n705": "BlowingHailV2",
+		"n905": "BlowingHailV2", "n907": "Haze", "n900": "Haze"  # "xxxx1": "WindyV2"
+		})  # cleartext description of msn-weathercodes
+	omwDescs = MappingProxyType({
+		"0": "clear sky", "1": "mainly clear", "2": "partly cloudy", "3": "overcast", "45": "fog", "48": "depositing rime fog", "51": "light drizzle",
+		"53": "moderate drizzle", "55": "dense intensity drizzle", "56": "light freezing drizzle", "57": "dense intensity freezing drizzle",
+		"61": "slight rain", "63": "moderate rain", "65": "heavy intensity rain", "66": "light freezing rain", "67": "heavy intensity freezing rain",
+		"71": "slight snow fall", "73": "moderate snow fall", "75": "heavy intensity snow fall", "77": "snow grains", "80": "slight rain showers",
+		"81": "moderate rain showers", "82": "violent rain showers", "85": "slight snow showers", "86": "heavy snow showers",
+		"95": "slight or moderate thunderstorm", "96": "thunderstorm with slight hail", "99": "thunderstorm with heavy hail"
+		})  # cleartext description of omw-weathercodes
+	owmDescs = MappingProxyType({
+		"200": "thunderstorm with light rain", "201": "thunderstorm with rain", "202": "thunderstorm with heavy rain",
+		"210": "light thunderstorm", "211": "thunderstorm", "212": "heavy thunderstorm", "221": "ragged thunderstorm",
+		"230": "thunderstorm with light drizzle", "231": "thunderstorm with drizzle", "232": "thunderstorm with heavy drizzle",
+		"300": "light intensity drizzle", "301": "drizzle", "302": "heavy intensity drizzle", "310": "light intensity drizzle rain",
+		"311": "drizzle rain", "312": "heavy intensity drizzle rain", "313": "shower rain and drizzle", "314": "heavy shower rain and drizzle",
+		"321": "shower drizzle", "500": "light rain", "501": "moderate rain", "502": "heavy intensity rain", "503": "very heavy rain",
+		"504": "extreme rain", "511": "freezing rain", "520": "light intensity shower rain", "521": "shower rain", "522": "heavy intensity shower rain",
+		"531": "ragged shower rain", "600": "light snow", "601": "Snow", "602": "Heavy snow", "611": "Sleet", "612": "Light shower sleet",
+		"613": "Shower sleet", "615": "Light rain and snow", "616": "Rain and snow", "620": "Light shower snow", "621": "Shower snow",
+		"622": "Heavy shower snow", "701": "mist", "711": "Smoke", "721": "Haze", "731": "sand/ dust whirls", "741": "fog", "751": "sand",
+		"761": "dust", "762": "volcanic ash", "771": "squalls", "781": "tornado", "800": "clear sky", "801": "few clouds: 11-25%",
+		"802": "scattered clouds: 25-50%", "803": "broken clouds: 51-84%", "804": "overcast clouds: 85-100%"
+		})  # cleartext description of owm-weathercodes, OpenWeatherMap is DEPRECATED
+	yahooDescs = MappingProxyType({
+		"0": "tornado", "1": "tropical storm", "2": "hurricane", "3": "severe thunderstorms", "4": "thunderstorms", "5": "mixed rain and snow",
+		"6": "mixed rain and sleet", "7": "mixed snow and sleet", "8": "freezing drizzle", "9": "drizzle", "10": "freezing rain",
+		"11": "showers (light)", "12": "showers (heavier)", "13": "snow flurries", "14": "light snow showers", "15": "blowing snow", "16": "snow",
+		"17": "hail", "18": "sleet", "19": "dust", "20": "foggy", "21": "haze", "22": "smoky", "23": "blustery", "24": "windy", "25": "cold",
+		"26": "cloudy", "27": "mostly cloudy (night)", "28": "mostly cloudy (day)", "29": "partly cloudy (night)", "30": "partly cloudy (day)",
+		"31": "clear (night)", "32": "sunny (day)", "33": "fair (night)", "34": "fair (day)", "35": "mixed rain and hail", "36": "hot",
+		"37": "isolated thunderstorms", "38": "scattered thunderstorms", "39": "capricious weather", "40": "scattered showers",
+		"41": "heavy snow", "42": "scattered snow showers", "43": "heavy snow", "44": "partly cloudy", "45": "rain showers (night)",
+		"46": "snow showers (night)", "47": "thundershowers (night)", "NA": "not available"
+		})  # cleartext description of modified yahoo-iconcodes
+	meteoDescs = MappingProxyType({
+		"!": "windy_rain_inv", "\"": "snow_inv", "#": "snow_heavy_inv", "$": "hail_inv", "%": "clouds_inv", "&": "clouds_flash_inv", "'": "temperature",
+		"(": "compass", ")": "na", "*": "celcius", "+": "fahrenheit", "0": "clouds_flash_alt", "1": "sun_inv", "2": "moon_inv", "3": "cloud_sun_inv",
+		"4": "cloud_moon_inv", "5": "cloud_inv", "6": "cloud_flash_inv", "7": "drizzle_inv", "8": "rain_inv", "9": "windy_inv", "A": "sunrise",
+		"B": "sun", "C": "moon", "D": "eclipse", "E": "mist", "F": "wind", "G": "snowflake", "H": "cloud_sun", "I": "cloud_moon", "J": "fog_sun",
+		"K": "fog_moon", "L": "fog_cloud", "M": "fog", "N": "cloud", "O": "cloud_flash", "P": "cloud_flash_alt", "Q": "drizzle", "R": "rain",
+		"S": "windy", "T": "windy_rain", "U": "snow", "V": "snow_alt", "W": "snow_heavy", "X": "hail", "Y": "clouds", "Z": "clouds_flash"
+		})  # cleartext description of modified meteo-iconcodes
+	AGENTS = (
+			"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.10 Safari/605.1.1",
+			"Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.3",
+			"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.3",
+			"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 Trailer/93.3.8652.5",
+			"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 Edg/134.0.0.",
+			"Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:142.0) Gecko/20100101 Firefox/142.0"
+			)
+	__slots__ = ("apikey", "asyncclient", "cache", "callback", "dataReady", "error", "fallback", "geodata", "geoindex", "grid", "headers", "iconmisses", "info", "infomode", "lastgood", "lock", "memo", "metrics",
+				"mode", "parser", "pending", "reduced", "reducedhits", "reducedmisses", "revalidate", "scheme", "session", "streaming", "units", "written", "__weakref__")
+	MAXLASTGOOD = 64  # results kept for 'revalidate'
+	DIFFBASE = 12  # changes written as diff only before 'writereducedjson' writes the full file again
+
+	def __init__(self, newmode="msn", apikey=None, session=None, cache=None, asyncclient=None, streaming=False, revalidate=False, fallback=False, geoindex=None, grid=None, metrics=None):
+
+		self.headers = {"User-Agent": choice(self.AGENTS), 'Accept': 'application/json'}
+		self.session = session  # None = use the shared connection pool (see WIsession.shared)
+		self.asyncclient = asyncclient  # None = use the shared client of the asyncio engine (see WIasyncclient.shared)
+		self.streaming = streaming  # True = reduced requests parse only the fields of the reduced view (see WIselector)
+		self.revalidate = revalidate  # True = 'start' returns the last good result at once (marked as stale) and refreshes it in the background
+		self.fallback = fallback  # True = failed fetches are repeated with the other sources (order of wiglobals.SOURCES, 'owm' only with API-key)
+		self.lastgood = None  # (geodata, units, scheme, reduced): (storetime, result), created on first use
+		self.grid = wiglobals.GRIDS if grid is True else grid  # None = exact coordinates, True = grid cells of wiglobals.GRIDS, float = degrees for all sources or dict {mode: degrees}
+		self.metrics = metrics or wimetrics  # durations, bytes and events of this instance, shared by all instances unless an own WImetrics is given
+		self.geoindex = WIgeoindex.shared(geoindex) if isinstance(geoindex, str) else geoindex  # str = file of a persistent WIgeoindex (one per file), None = every search asks the provider
+		self.cache = None
+		self.setcache(cache)
 		self.error, self.info, self.mode, self.parser, self.geodata, self.units, self.callback = None, None, None, None, None, None, None
+		self.infomode = None  # source of 'info', differs from 'mode' after a fallback
 		self.reduced, self.dataReady = False, False
+		self.scheme = "de-de"
+		self.lock = RLock()  # guards the published state of the latest finished request
+		self.pending = set()  # requests in progress (see 'stop')
+		self.memo = None  # (info, settings, reduced, error) of the latest reduction, a new fetch replaces 'info' and so invalidates it
+		self.reducedhits, self.reducedmisses = 0, 0
+		self.iconmisses = Counter()  # (source, code): count of codes without icon mapping
+		self.written = {}  # filename: sha1 of the latest write, unchanged contents are not written again; (filename, diff): state of 'writediff'
 		self.setmode(newmode, apikey)
 
 	def setmode(self, newmode="msn", apikey=None):
@@ -175,53 +1563,93 @@ class Weatherinfo:
 			self.parser = None
 			return self.error
 
+	def setcache(self, cache=None):  # cache: None/False = off, True = default folder, str = cache folder or a WIcache object
+		self.cache = self.opencache(cache)
+
+	def opencache(self, cache):
+		if cache is None or cache is False:
+			return None
+		if cache is True:
+			return WIcache.shared()
+		if isinstance(cache, str):
+			return WIcache.shared(cache)
+		return cache
+
+	def cachefor(self, req):  # cache of a single call (see 'start'), else the cache of the instance
+		cache = None if req is None or req is self else req.cache
+		return self.cache if cache is None else cache or None
+
+	def coordinates(self, req):  # (lon, lat) sent to the provider: center of the grid cell of the location if 'grid' is set
+		lon, lat = float(req.geodata[1]), float(req.geodata[2])
+		step = (self.grid.get(req.mode) if isinstance(self.grid, dict) else self.grid) if self.grid else None
+		if step:
+			lon, lat = round((floor(lon / step) + 0.5) * step, 4), round((floor(lat / step) + 0.5) * step, 4)
+		return lon, lat
+
+	def cachekey(self, endpoint, req):
+		lon, lat = self.coordinates(req)
+		key = (endpoint, req.mode, round(lon, 4), round(lat, 4), req.units, req.scheme)
+		return key + ("selected",) if self.selector(req) else key  # selected data must not be served to full requests
+
+	def selector(self, req):  # WIselector for streaming requests of the reduced view, None = parse complete payloads (also sources without WIselector.PATHS)
+		return WIselector.forsource(req.mode) if req is not None and self.streaming and req.reduced else None
+
 	def directionsign(self, degree):
-		return "." if degree < 0 else ["↓ N", "↙ NE", "← E", "↖ SE", "↑ S", "↗ SW", "→ W", "↘ NW"][int(round(degree % 360 / 45 % 7.5))]
+		return WIreducer.FORMATS["dirsign"](degree)
 
-	def convert2icon(self, src, code):
+	def convert2icon(self, src, code):  # returns a read-only {"yahooCode", "meteoCode"} or None
 		self.error = None
 		src = src.lower()
 		if code is None:
 			self.error = "[%s] ERROR in module 'convert2icon': input code value is 'None'" % wiglobals.MODULE_NAME
-			print(self.error)
+			self.iconcodes(src, code)
 			return
-		code = str(code).strip()
-		selection = {"msn": self.msnCodes, "owm": self.owmCodes, "omw": self.omwCodes}
-		if src and src in selection:
-			common = selection[src]
-		else:
+		if src not in self.icons:
 			print("WARNING in module 'convert2icon': convert source '%s' is unknown. Valid is: %s" % (src, wiglobals.SOURCES))
 			return
-		result = {}
-		if src == "msn":
-			code = code[:4]  # remove 'windy'-flag in MSN-code if present
-		if code in common:
-			result["yahooCode"] = common[code][0]
-			result["meteoCode"] = common[code][1]
-		else:
-			result["yahooCode"] = "NA"
-			result["meteoCode"] = "NA"
-			print("WARNING in module 'convert2icon': key '%s' not found in converting dicts." % code)
-			return
+		return self.iconcodes(src, code)
+
+	def convert_many(self, src, codes):  # bulk version of 'convert2icon': list of read-only {"yahooCode", "meteoCode"} or None
+		src = src.lower()
+		return [self.iconcodes(src, code) for code in codes] if src in self.icons else [None] * len(codes)
+
+	def iconcodes(self, src, code):  # src in lower case, misses are counted in 'iconmisses' (source, code)
+		table = self.icons.get(src)
+		result = table.get(code) if table else None
+		if result is None and table and code is not None:
+			code = str(code).strip()
+			result = table.get(code[:4] if src == "msn" else code)  # remove 'windy'-flag in MSN-code if present
+		if result is None:
+			with self.lock:
+				self.iconmisses[(src, code)] += 1
 		return result
 
-	def getCitylist(self, cityname=None, scheme="de-de", count=10):
-		self.error = None
+	def getCitylist(self, cityname=None, scheme="de-de", count=10, request=None):  # request: own context for concurrent callers, None = errors go to this instance. Errors: [] = no city found, None = other errors (e.g. of the provider)
+		req = self if request is None else request
+		req.error = None
 		if not cityname:
-			self.error = "[%s] ERROR in module 'getCitylist': missing cityname." % wiglobals.MODULE_NAME
+			req.error = "[%s] ERROR in module 'getCitylist': missing cityname." % wiglobals.MODULE_NAME
 			return
+		query = self.separateCityCountry(cityname)
+		language = scheme[:2]  # key of the geoindex, 'scheme' is rewritten for OWM below
+		limit = min(count, 9)  # places of the answer, 'count' is reused below
+		citylist = self.geoindex.lookup(query[0], query[1], language, limit) if self.geoindex else None
+		if citylist:  # answered locally
+			return citylist
 
-		elif self.mode in ["msn", "omw"]:
+		if self.mode in ["msn", "omw"]:
 			cityname, country = self.separateCityCountry(cityname)
 			jsonData = None
 			for city in [cityname, cityname.split(" ")[0]]:
 				params = [("language", f"{scheme[:2]}"), ("count", f"{count}"), ("name", f"{city}{'' if country is None else ',%s' % country}")]
-				jsonData = self.apiserver("https://geocoding-api.open-meteo.com/v1/search", params)
+				jsonData = self.apiserver("https://geocoding-api.open-meteo.com/v1/search", params, ("geocoding", "omw", city, country, scheme[:2], count), req)
+				if req.error:  # the provider failed, which is no answer about the city
+					return
 				if jsonData and "latitude" in jsonData.get("results", [""])[0]:
 					break
 			if jsonData is None or "results" not in jsonData:
-				self.error = "[%s] ERROR in module 'getCitylist.owm': no city '%s' found on the server. Try another wording." % (wiglobals.MODULE_NAME, cityname)
-				return
+				req.error = "[%s] ERROR in module 'getCitylist.owm': no city '%s' found on the server. Try another wording." % (wiglobals.MODULE_NAME, cityname)
+				return []
 			count = 0
 			citylist = []
 			try:
@@ -236,7 +1664,7 @@ class Weatherinfo:
 					admin3 = ", %s" % hit["admin3"] if "admin3" in hit else ""
 					citylist.append(("%s%s%s%s%s" % (cityname, admin1, admin2, admin3, country), hit["longitude"], hit["latitude"]))
 			except Exception as err:
-				self.error = "[%s] ERROR in module 'getCitylist.owm': general error. %s" % (wiglobals.MODULE_NAME, str(err))
+				req.error = "[%s] ERROR in module 'getCitylist.owm': general error. %s" % (wiglobals.MODULE_NAME, str(err))
 				return
 
 		elif self.mode == "owm":
@@ -247,12 +1675,14 @@ class Weatherinfo:
 			jsonData = None
 			for city in [cityname, cityname.split(" ")[0]]:
 				link = "http://api.openweathermap.org/geo/1.0/direct?q=%s%s&lang=%s&limit=%s&appid=%s" % (city, "" if country is None else ",%s" % country, scheme[:2], count, self.apikey)
-				jsonData = self.apiserver(link)
+				jsonData = self.apiserver(link, cachekey=("geocoding", "owm", city, country, scheme[:2], count), request=req)
+				if req.error:  # the provider failed, which is no answer about the city
+					return
 				if jsonData:
 					break
 			if not jsonData:
-				self.error = "[%s] ERROR in module 'getCitylist.owm': no city '%s' found on the server. Try another wording." % (wiglobals.MODULE_NAME, cityname)
-				return
+				req.error = "[%s] ERROR in module 'getCitylist.owm': no city '%s' found on the server. Try another wording." % (wiglobals.MODULE_NAME, cityname)
+				return []
 			count = 0
 			citylist = []
 			try:
@@ -265,12 +1695,14 @@ class Weatherinfo:
 					country = ", %s" % hit["country"].upper() if "country" in hit else ""
 					citylist.append(("%s%s%s" % (cityname, state, country), hit["lon"], hit["lat"]))
 			except Exception as err:
-				self.error = "[%s] ERROR in module 'getCitylist.owm': general error. %s" % (wiglobals.MODULE_NAME, str(err))
+				req.error = "[%s] ERROR in module 'getCitylist.owm': general error. %s" % (wiglobals.MODULE_NAME, str(err))
 				return
 
 		else:
-			self.error = "[%s] ERROR in module 'getCitylist': unknown mode." % wiglobals.MODULE_NAME
+			req.error = "[%s] ERROR in module 'getCitylist': unknown mode." % wiglobals.MODULE_NAME
 			return
+		if self.geoindex and citylist:
+			self.geoindex.learn(query[0], query[1], language, citylist, limit)
 		return citylist
 
 	def separateCityCountry(self, cityname):
@@ -283,500 +1715,520 @@ class Weatherinfo:
 					break
 			return cityname, country
 
-	def start(self, geodata=None, cityID=None, units="metric", scheme="de-de", reduced=False, callback=None):  # cityID was left only for compatibility reasons
-		self.error = None
-		self.geodata = ("", 0, 0) if geodata is None else geodata
-		self.units = units.lower()
-		self.scheme = scheme.lower()
-		self.callback = callback
-		self.reduced = reduced
-		if not self.geodata[0]:
-			self.error = "[%s] ERROR in module 'start': missing cityname for mode '%s'." % (wiglobals.MODULE_NAME, self.mode)
-		elif not self.geodata[1] or not self.geodata[2]:
-			self.error = "[%s] ERROR in module 'start': missing geodata for mode '%s'." % (wiglobals.MODULE_NAME, self.mode)
-		elif self.mode not in wiglobals.SOURCES:
-			self.error = "[%s] ERROR in module 'start': unknown mode '%s'." % (wiglobals.MODULE_NAME, self.mode)
+	def start(self, geodata=None, cityID=None, units="metric", scheme="de-de", reduced=False, callback=None, cache=None):  # cityID was left only for compatibility reasons, cache: this call only (None = cache of the instance)
+		req = WIrequest(self.mode, geodata, units, scheme, reduced, callback)  # every call gets its own context, so one instance can serve concurrent calls
+		if cache is not None:
+			req.cache = self.opencache(cache) or False
+		req.error = self.checkrequest(req)
+		parser = self.parser
+		with self.lock:
+			self.error = req.error
+			self.callback = callback
+			if not req.error and parser:
+				self.pending.add(req)
+		stale = self.laststate(req) if self.revalidate and parser and not req.error else None
+		if stale is not None and not callback:  # refresh in the background unless an identical request is in flight already
+			if self.flightkey(req) not in WIflight.flights:
+				from threading import Thread
+				Thread(target=parser, args=(req,), daemon=True).start()
+			else:
+				with self.lock:
+					self.pending.discard(req)
+			return stale
 		if callback:
-			if self.error:
-				callback(None, self.error)
-			elif self.parser:
-				callInThread(self.parser)
+			if stale is not None:
+				callback(stale, None)  # followed by the fresh result
+			if req.error:
+				callback(None, req.error)
+			elif parser and not WIflight.join(self.flightkey(req), self, req):  # else an identical request in flight calls back
+				from twisted.internet.reactor import callInThread
+				callInThread(parser, req)
 		else:
-			if self.error:
+			if req.error:
 				return
-			elif self.parser:
-				info = self.parser()
-				return info
+			elif parser:
+				return parser(req)
 
-	def stop(self):
-		self.error = None
-		self.callback = None
+	def laststate(self, req):  # copy of the last good result marked with "stale" and "age" (seconds), None = nothing stored
+		with self.lock:
+			entry = self.lastgood.get((tuple(req.geodata), req.units, req.scheme, req.reduced)) if self.lastgood else None
+		return dict(entry[1], stale=True, age=round(time() - entry[0])) if entry else None
+
+	def snapshot(self):  # consistent copy of the latest finished request
+		with self.lock:
+			req = WIrequest(self.infomode or self.mode, self.geodata, self.units or "metric", self.scheme, self.reduced)
+			req.info, req.dataReady = self.info, self.dataReady
+		return req
 
-	def apiserver(self, link, params=None):
+	def checkrequest(self, req, module="start"):
+		if not req.geodata[0]:
+			return "[%s] ERROR in module '%s': missing cityname for mode '%s'." % (wiglobals.MODULE_NAME, module, req.mode)
+		elif not req.geodata[1] or not req.geodata[2]:
+			return "[%s] ERROR in module '%s': missing geodata for mode '%s'." % (wiglobals.MODULE_NAME, module, req.mode)
+		elif req.mode not in wiglobals.SOURCES:
+			return "[%s] ERROR in module '%s': unknown mode '%s'." % (wiglobals.MODULE_NAME, module, req.mode)
+		elif req.mode == "owm" and not self.apikey:
+			return "[%s] ERROR in module '%s': API-key is missing!" % (wiglobals.MODULE_NAME, module)
+
+	def start_many(self, geolist, units="metric", scheme="de-de", reduced=False, workers=8, cache=None):  # returns [(geodata, data, error), ...] in the order of geolist
 		self.error = None
-		jsonData = {}
-		if link:
-			try:
-				response = get(link, headers=self.headers, params=params, timeout=(3.05, 6))
-				response.raise_for_status()
-				jsonData = loads(response.content)
-			except exceptions.RequestException as err:
-				self.error = "[%s] ERROR in module 'apiserver': '%s" % (wiglobals.MODULE_NAME, str(err))
+		cache = None if cache is None else self.opencache(cache) or False
+		requests = [WIrequest(self.mode, geodata, units, scheme, reduced) for geodata in geolist]
+		pending = []
+		for req in requests:
+			req.cache = cache
+			req.error = self.checkrequest(req, "start_many")
+			if not req.error:
+				pending.append(req)
+		if self.mode == "omw":  # Open-Meteo accepts many coordinates per call
+			jobs = [(self.omwbatch, pending[idx:idx + wiglobals.OMWBATCH]) for idx in range(0, len(pending), wiglobals.OMWBATCH)]
 		else:
-			self.error = "[%s] ERROR in module 'apiserver': missing link." % wiglobals.MODULE_NAME
-		return jsonData
+			groups = {}  # cachekey: [request, ...], locations in the same grid cell are fetched once
+			for req in pending:
+				groups.setdefault(self.cachekey("forecast", req), []).append(req)
+			jobs = [(self.fetchinfo, group[0]) for group in groups.values()]
+		if jobs:
+			from concurrent.futures import ThreadPoolExecutor
+			with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as executor:
+				for future in [executor.submit(*job) for job in jobs]:
+					future.result()
+		if self.mode != "omw":
+			for group in groups.values():
+				for req in group[1:]:
+					req.mode, req.info, req.error = group[0].mode, group[0].info, group[0].error
+		for req in pending:
+			if req.info and not req.error:
+				req.dataReady = True
+				req.result = self.getreducedinfo(req) if req.reduced else req.info
+		return [(req.geodata, req.result, req.error) for req in requests]
+
+	async def fetch(self, geodata=None, units="metric", scheme="de-de", reduced=False):  # asyncio counterpart of 'start': the result is published too (WI.info, 'getreducedinfo', 'writejson', ...)
+		req = WIrequest(self.mode, geodata, units, scheme, reduced)
+		await self.fetchasync(req, "fetch")
+		return self.finish(req)
 
-	def msnparser(self):
+	async def fetch_many(self, geolist, units="metric", scheme="de-de", reduced=False):  # returns [(geodata, data, error), ...] in the order of geolist, like 'start_many' nothing is published
+		from asyncio import gather
 		self.error = None
-		self.info = None
-		self.dataReady = False
-		if self.geodata:
-			tempunit = "F" if self.units == "imperial" else "C"
-			link = "68747470733A2F2F6170692E6D736E2E636F6D2F7765617468657266616C636F6E2F776561746865722F6F766572766965773F266C6F6E3D2573266C61743D2573266C6F63616C653D257326756E6974733D25732661707049643D39653231333830632D666631392D346337382D623465612D313935353865393361356433266170694B65793D6A356934674471484C366E47597778357769356B5268586A74663263357167465839667A666B30544F6F266F6369643D73757065726170702D6D696E692D7765617468657226777261704F446174613D66616C736526696E636C7564656E6F7763617374696E673D7472756526666561747572653D6C696665646179266C696665446179733D363"
-		else:
-			self.error = "[%s] ERROR in module 'msnparser': missing geodata." % wiglobals.MODULE_NAME
-			if self.callback:
-				self.callback(None, self.error)
+		requests = [WIrequest(self.mode, geodata, units, scheme, reduced) for geodata in geolist]
+		await gather(*[self.fetchasync(req, "fetch_many") for req in requests])
+		return [(req.geodata, req.result, req.error) for req in requests]
+
+	async def fetchasync(self, req, module):
+		req.error = self.checkrequest(req, module)
+		if req.error:
 			return
-		if self.callback:
-			print("[%s] accessing MSN for weatherdata..." % wiglobals.MODULE_NAME)
-		self.info = self.apiserver(bytes.fromhex(link[:-1]).decode('utf-8') % (float(self.geodata[1]), float(self.geodata[2]), self.scheme, tempunit))
-		if self.callback:
-			if self.error:
-				self.callback(None, self.error)
-			else:
-				print("[%s] MSN successfully accessed..." % wiglobals.MODULE_NAME)
-				self.dataReady = True
-				self.callback(self.getreducedinfo() if self.reduced else self.info, None)
-		if self.info and self.error is None:
-			self.dataReady = True
-			return self.getreducedinfo() if self.reduced else self.info
-
-	def omwparser(self):
-		self.error = None
-		self.info = None
-		self.dataReady = False
-		if self.geodata:
-			params = [("timezone", "auto"),
-				("latitude", f"{round(float(self.geodata[2]), 4)}"),
-				("longitude", f"{round(float(self.geodata[1]), 4)}"),
+		client = self.asyncclient or WIasyncclient.shared()
+		info = {}
+		cache = self.cachefor(req)
+		for link, params, cachekey in self.requestlinks(req):
+			jsonData = cache.get(cachekey) if cache else None
+			if cache:
+				self.metrics.count("cache", req.mode, "miss" if jsonData is None else "hit")
+			if jsonData is None:
+				try:
+					with self.metrics.stage("fetch", req.mode, self.metrics.host(link)):
+						jsonData = await client.getjson(link, self.headers, params, self.selector(req))
+				except (OSError, ValueError, EOFError) as err:
+					req.error = "[%s] ERROR in module '%s': '%s" % (wiglobals.MODULE_NAME, module, str(err) or err.__class__.__name__)
+					return
+				if cache and jsonData:
+					cache.put(cachekey, jsonData)
+			info = info | jsonData if info else jsonData
+		req.info = info
+		req.dataReady = True
+		req.result = self.getreducedinfo(req) if req.reduced else info
+
+	def requestlinks(self, req):  # returns [(link, params, cachekey), ...] for the mode of the request
+		if req.mode == "msn":
+			tempunit = "F" if req.units == "imperial" else "C"
+			link = "68747470733A2F2F6170692E6D736E2E636F6D2F7765617468657266616C636F6E2F776561746865722F6F766572766965773F266C6F6E3D2573266C61743D2573266C6F63616C653D257326756E6974733D25732661707049643D39653231333830632D666631392D346337382D623465612D313935353865393361356433266170694B65793D6A356934674471484C366E47597778357769356B5268586A74663263357167465839667A666B30544F6F266F6369643D73757065726170702D6D696E692D7765617468657226777261704F446174613D66616C736526696E636C7564656E6F7763617374696E673D7472756526666561747572653D6C696665646179266C696665446179733D363"
+			return [(bytes.fromhex(link[:-1]).decode('utf-8') % (*self.coordinates(req), req.scheme, tempunit), None, self.cachekey("forecast", req))]
+		elif req.mode == "omw":
+			return [("https://api.open-meteo.com/v1/forecast", self.omwparams([self.coordinates(req)], req.units), self.cachekey("forecast", req))]
+		elif req.mode == "owm":
+			lon, lat = self.coordinates(req)
+			params = [("lat", f"{round(lat, 4)}"),
+					("lon", f"{round(lon, 4)}"),
+					("lang", req.scheme[:2]),
+					("units", req.units),
+					("appid", self.apikey)
+					]
+			return [("https://api.openweathermap.org/data/2.5/weather", params, self.cachekey("current", req)),  # current only
+					("https://api.openweathermap.org/data/2.5/forecast", params, self.cachekey("forecast", req))]  # forecasts only
+		return []
+
+	def omwparams(self, coordinates, units):  # coordinates: [(lon, lat), ...]
+		return [("timezone", "auto"),
+				("latitude", ",".join(f"{round(lat, 4)}" for lon, lat in coordinates)),
+				("longitude", ",".join(f"{round(lon, 4)}" for lon, lat in coordinates)),
 				("current", "pressure_msl"),
 				("hourly", "temperature_2m,relativehumidity_2m,apparent_temperature,weathercode,windspeed_10m,wind_gusts_10m,winddirection_10m,precipitation_probability,uv_index,visibility,pressure_msl"),
 				("daily", "sunrise,sunset,weathercode,precipitation_probability_max,temperature_2m_max,temperature_2m_min,wind_speed_10m_max,wind_gusts_10m_max,wind_direction_10m_dominant,uv_index_max,apparent_temperature_max,apparent_temperature_min"),
-				("windspeed_unit", "mph" if self.units == "imperial" else "kmh"),
-				("temperature_unit", "fahrenheit" if self.units == "imperial" else "celsius")
+				("windspeed_unit", "mph" if units == "imperial" else "kmh"),
+				("temperature_unit", "fahrenheit" if units == "imperial" else "celsius")
 				]
-		else:
-			self.error = "[%s] ERROR in module 'omwparser': missing geodata." % wiglobals.MODULE_NAME
-			if self.callback:
-				self.callback(None, self.error)
-			return
-		if self.callback:
-			print("[%s] accessing OMW for weatherdata..." % wiglobals.MODULE_NAME)
-		self.info = self.apiserver("https://api.open-meteo.com/v1/forecast", params)
-		if self.callback:
-			if self.error:
-				self.callback(None, self.error)
-			else:
-				print("[%s] OMW successfully accessed." % wiglobals.MODULE_NAME)
-				self.dataReady = True
-				self.callback(self.getreducedinfo() if self.reduced else self.info, self.error)
-		if self.info and self.error is None:
-			self.dataReady = True
-			return self.getreducedinfo() if self.reduced else self.info
-
-	def owmparser(self):
-		self.error = None
-		self.info = None
-		self.dataReady = False
-		if not self.apikey:
-			self.error = "[%s] ERROR in module' owmparser': API-key is missing!" % wiglobals.MODULE_NAME
-			if self.callback:
-				self.callback(None, self.error)
-			return
-		if not self.geodata:
-			self.error = "[%s] ERROR in module 'owmparser': missing geodata." % wiglobals.MODULE_NAME
-			if self.callback:
-				self.callback(None, self.error)
+
+	def fetchinfo(self, req):  # fetch all data of a request into req.info, req.mode is changed if a fallback source was used
+		modes = [req.mode]
+		if self.fallback and req is not self:  # the legacy call without request must not change the mode of the instance
+			modes += [mode for mode in wiglobals.SOURCES if mode != req.mode and (mode != "owm" or self.apikey)]
+		errors = []
+		for mode in modes:
+			req.mode, req.error = mode, None
+			info = {}
+			for link, params, cachekey in self.requestlinks(req):
+				jsonData = self.apiserver(link, params, cachekey, req)
+				if req.error:
+					break
+				info = info | jsonData if info else jsonData
+			req.info = info
+			if req.error is None:
+				if errors:
+					print("[%s] WARNING in module 'fetchinfo': source '%s' failed, data taken from '%s'." % (wiglobals.MODULE_NAME, modes[0], mode))
+				return info
+			errors.append(req.error)
+		req.mode, req.error = modes[0], errors[0]
+		return info
+
+	def omwbatch(self, requests):  # fetch all requests with a single call, cached data is taken first
+		missing = []
+		for req in requests:
+			cache = self.cachefor(req)
+			req.info = cache.get(self.cachekey("forecast", req)) if cache else None
+			if req.info is None:
+				missing.append(req)
+		if not missing:
 			return
-		params = [("lat", f"{round(float(self.geodata[2]), 4)}"),
-				("lon", f"{round(float(self.geodata[1]), 4)}"),
-				("lang", self.scheme[:2]),
-				("units", self.units),
-				("appid", self.apikey)
-				]
-		if self.callback:
-			print("[%s] accessing OWM for weatherdata..." % wiglobals.MODULE_NAME)
-		self.info = self.apiserver("https://api.openweathermap.org/data/2.5/weather", params)  # current only
-		self.info |= self.apiserver("https://api.openweathermap.org/data/2.5/forecast", params)  # forecasts only
-		if self.callback:
-			if self.error:
-				self.callback(None, self.error)
-			else:
-				print("[%s] OWM successfully accessed..." % wiglobals.MODULE_NAME)
-				self.dataReady = True
-				self.callback(self.getreducedinfo() if self.reduced else self.info, self.error)
-		if self.info and self.error is None:
-			self.dataReady = True
-			return self.getreducedinfo() if self.reduced else self.info
-
-	def getreducedinfo(self):
-		self.error = None
-		daytextfmt = "%a, %d."
-		datefmt = "%Y-%m-%d"
-		reduced = {}
-		if self.info:
-			if self.parser and self.mode == "msn":
-				if self.geodata:
-					try:
-						source = self.info["responses"][0]["source"]
-						current = self.info["responses"][0]["weather"][0]["current"]
-						forecast = self.info["responses"][0]["weather"][0]["forecast"]["days"]
-						reduced["source"] = "MSN Weather"
-						location = self.geodata[0].split(", ")
-						reduced["name"] = location[0].split(", ")[0]
-						reduced["longitude"] = str(source["coordinates"]["lon"])
-						reduced["latitude"] = str(source["coordinates"]["lat"])
-						reduced["pressunit"] = self.info["units"]["pressure"]
-						tempunit = self.info["units"]["temperature"].strip("\u200e")
-						reduced["tempunit"] = tempunit
-						reduced["windunit"] = self.info["units"]["speed"]
-						reduced["precunit"] = "%"
-						reduced["uvindexunit"] = ""
-						reduced["visibiliyunit"] = self.info["units"]["distance"]
-						reduced["current"] = {}
-						reduced["current"]["observationPoint"] = self.createFullname(location)
-						currdate = datetime.fromisoformat(current["created"]).replace(tzinfo=None)
-						reduced["current"]["observationTime"] = currdate.isoformat()
-						sunrise = datetime.fromisoformat(forecast[0]["almanac"]["sunrise"]).replace(tzinfo=None)
-						reduced["current"]["sunrise"] = sunrise.isoformat()
-						sunset = datetime.fromisoformat(forecast[0]["almanac"]["sunset"]).replace(tzinfo=None)
-						reduced["current"]["sunset"] = sunset.isoformat()
-						moonrise = datetime.fromisoformat(forecast[0]["almanac"]["moonrise"]).replace(tzinfo=None)
-						reduced["current"]["moonrise"] = moonrise.isoformat()
-						moonset = datetime.fromisoformat(forecast[0]["almanac"]["moonset"]).replace(tzinfo=None)
-						reduced["current"]["moonset"] = moonset.isoformat()
-						now = datetime.now()
-						reduced["current"]["isNight"] = now < sunrise or now > sunset
-						pvdrCode = forecast[0]["hourly"][0]["symbol"] if forecast[0]["hourly"] else current["symbol"]
-						reduced["current"]["ProviderCode"] = pvdrCode
-						iconCode = self.convert2icon("MSN", pvdrCode)
-						reduced["current"]["yahooCode"] = iconCode.get("yahooCode", "NA") if iconCode else "NA"
-						reduced["current"]["meteoCode"] = iconCode.get("meteoCode", ")") if iconCode else ")"
-						reduced["current"]["pressure"] = "%.0f" % current["baro"]
-						reduced["current"]["temp"] = "%.0f" % current["temp"]
-						reduced["current"]["feelsLike"] = "%.0f" % current["feels"]
-						reduced["current"]["humidity"] = "%.0f" % current["rh"]
-						reduced["current"]["windSpeed"] = "%.0f" % current["windSpd"]
-						windDir = current["windDir"]
-						reduced["current"]["windDir"] = str(windDir)
-						reduced["current"]["windDirSign"] = self.directionsign(windDir)
-						reduced["current"]["windGusts"] = "%.0f" % current["windGust"]
-						reduced["current"]["uvIndex"] = "%.0f" % current["uv"]
-						reduced["current"]["visibility"] = "%.0f" % current["vis"]
-						reduced["current"]["maxTemp"] = "%.0f" % forecast[0]["daily"]["tempHi"]
-						reduced["current"]["minTemp"] = "%.0f" % forecast[0]["daily"]["tempLo"]
-						reduced["current"]["precipitation"] = "%.0f" % forecast[0]["daily"]["day"]["precip"]
-						reduced["current"]["dayText"] = currdate.strftime(daytextfmt)
-						reduced["current"]["day"] = currdate.strftime("%A")
-						reduced["current"]["shortDay"] = currdate.strftime("%a")
-						reduced["current"]["date"] = currdate.strftime(datefmt)
-						reduced["current"]["text"] = forecast[0]["hourly"][0]["pvdrCap"] if forecast[0]["hourly"] else current["capAbbr"]
-						reduced["current"]["raintext"] = self.info["responses"][0]["weather"][0]["nowcasting"]["shortSummary"]
-						reduced["forecast"] = {}
-						for idx in range(7):  # collect forecast of today and next 6 days
-							reduced["forecast"][idx] = {}
-							pvdrCode = forecast[idx]["daily"]["symbol"]
-							reduced["forecast"][idx]["ProviderCode"] = pvdrCode
-							iconCodes = self.convert2icon("MSN", pvdrCode)
-							reduced["forecast"][idx]["yahooCode"] = iconCodes.get("yahooCode", "NA") if iconCodes else "NA"
-							reduced["forecast"][idx]["meteoCode"] = iconCodes.get("meteoCode", ")") if iconCodes else ")"
-							reduced["forecast"][idx]["pressure"] = "%.0f" % forecast[idx]["daily"]["baro"]
-							reduced["forecast"][idx]["minTemp"] = "%.0f" % forecast[idx]["daily"]["tempLo"]
-							reduced["forecast"][idx]["maxTemp"] = "%.0f" % forecast[idx]["daily"]["tempHi"]
-							reduced["forecast"][idx]["maxFeelsLike"] = "%.0f" % forecast[idx]["daily"]["feelsHi"]
-							reduced["forecast"][idx]["minFeelsLike"] = "%.0f" % forecast[idx]["daily"]["feelsLo"]
-							reduced["forecast"][idx]["maxWindSpeed"] = "%.0f" % forecast[idx]["daily"]["windMax"]
-							windDir = forecast[idx]["daily"]["windMaxDir"]
-							reduced["forecast"][idx]["domWindDir"] = "%.0f" % windDir
-							reduced["forecast"][idx]["domWindDirSign"] = self.directionsign(windDir)
-							reduced["forecast"][idx]["maxWindGusts"] = "%.0f" % forecast[idx]["daily"]["windTh"]
-							reduced["forecast"][idx]["maxUvIndex"] = "%.0f" % forecast[idx]["daily"]["uv"]
-							reduced["forecast"][idx]["maxVisibility"] = "%.0f" % forecast[idx]["daily"]["vis"]
-							reduced["forecast"][idx]["precipitation"] = "%.0f" % forecast[idx]["daily"]["day"]["precip"]
-							reduced["forecast"][idx]["dayText"] = currdate.strftime(daytextfmt)
-							reduced["forecast"][idx]["day"] = currdate.strftime("%A")
-							reduced["forecast"][idx]["shortDay"] = currdate.strftime("%a")
-							reduced["forecast"][idx]["date"] = currdate.strftime(datefmt)
-							reduced["forecast"][idx]["text"] = forecast[idx]["daily"]["pvdrCap"]
-							reduced["forecast"][idx]["daySummary0"] = forecast[idx]["daily"]["day"]["summaries"][0].strip()
-							reduced["forecast"][idx]["daySummary1"] = forecast[idx]["daily"]["day"]["summaries"][1].strip().replace("°.", " %s." % tempunit)
-							reduced["forecast"][idx]["nightSummary0"] = forecast[idx]["daily"]["night"]["summaries"][0].strip()
-							reduced["forecast"][idx]["nightSummary1"] = forecast[idx]["daily"]["night"]["summaries"][1].strip().replace("°.", " %s." % tempunit)
-							umbrellaIndex = self.info["responses"][0]["weather"][0]["lifeDaily"]["days"][0]["umbrellaIndex"]
-							reduced["forecast"][idx]["umbrellaIndex"] = umbrellaIndex["longSummary2"] if "longSummary2" in umbrellaIndex else umbrellaIndex["summary"]
-							currdate = currdate + timedelta(1)
-					except Exception as err:
-						self.error = "[%s] ERROR in module 'getreducedinfo#msn': general error. %s" % (wiglobals.MODULE_NAME, str(err))
-						return
-
-			elif self.parser and self.mode == "omw":
-				if self.geodata:
-					try:
-						hourly = self.info["hourly"]
-						forecast = self.info["daily"]
-						reduced["source"] = "Open-Meteo Weather"
-						location = self.geodata[0].split(", ")
-						reduced["name"] = location[0].split(", ")[0]
-						reduced["longitude"] = str(self.info["longitude"])
-						reduced["latitude"] = str(self.info["latitude"])
-						reduced["pressunit"] = "mbar"
-						reduced["tempunit"] = self.info["hourly_units"]["temperature_2m"]
-						reduced["windunit"] = self.info["hourly_units"]["windspeed_10m"]
-						reduced["precunit"] = self.info["hourly_units"]["precipitation_probability"]
-						reduced["uvindexunit"] = self.info["hourly_units"]["uv_index"]
-						reduced["visibiliyunit"] = "miles" if self.units == "imperial" else "km"
-						reduced["current"] = {}
-						isotime = datetime.fromisoformat(self.info["current"]["time"]).astimezone()
-						timestr = isotime.replace(minute=0, second=0, microsecond=0).isoformat()[:16]
-						for idx, time in enumerate(hourly["time"]):  # collect current
-							if timestr in time:
-								reduced["current"]["observationPoint"] = self.createFullname(location)
-								reduced["current"]["observationTime"] = isotime.isoformat()[:19]
-								sunrise = datetime.fromisoformat(forecast["sunrise"][0])
-								reduced["current"]["sunrise"] = sunrise.isoformat()
-								sunset = datetime.fromisoformat(forecast["sunset"][0])
-								reduced["current"]["sunset"] = sunset.isoformat()
-								now = datetime.now()
-								reduced["current"]["isNight"] = now < sunrise or now > sunset
-								pvdrCode = hourly["weathercode"][idx]
-								reduced["current"]["ProviderCode"] = str(pvdrCode)
-								iconCode = self.convert2icon("OMW", pvdrCode)
-								if iconCode:
-									reduced["current"]["yahooCode"] = iconCode.get("yahooCode", "NA")
-									reduced["current"]["meteoCode"] = iconCode.get("meteoCode", ")")
-								reduced["current"]["pressure"] = "%.0f" % self.info["current"]["pressure_msl"]
-								reduced["current"]["temp"] = "%.0f" % hourly["temperature_2m"][0]
-								reduced["current"]["feelsLike"] = "%.0f" % hourly["apparent_temperature"][idx]
-								reduced["current"]["humidity"] = "%.0f" % hourly["relativehumidity_2m"][idx]
-								reduced["current"]["windSpeed"] = "%.0f" % hourly["windspeed_10m"][idx]
-								windDir = hourly["winddirection_10m"][idx]
-								reduced["current"]["windDir"] = str(windDir)
-								reduced["current"]["windDirSign"] = self.directionsign(windDir)
-								reduced["current"]["windGusts"] = "%.0f" % hourly["wind_gusts_10m"][idx]
-								reduced["current"]["uvIndex"] = "%.0f" % hourly["uv_index"][idx]
-								reduced["current"]["visibility"] = "%.0f" % round(hourly["visibility"][idx] / 1000)
-								currdate = datetime.fromisoformat(time)
-								reduced["current"]["dayText"] = currdate.strftime(daytextfmt)
-								reduced["current"]["day"] = currdate.strftime("%A")
-								reduced["current"]["shortDay"] = currdate.strftime("%a")
-								reduced["current"]["date"] = currdate.strftime(datefmt)
-								reduced["current"]["maxTemp"] = "%.0f" % forecast["temperature_2m_max"][0]
-								reduced["current"]["minTemp"] = "%.0f" % forecast["temperature_2m_min"][0]
-								reduced["current"]["precipitation"] = "%.0f" % hourly["precipitation_probability"][idx]
-								break
-						todaydate = hourly["time"][0][:10]
-						hourpress, hourcount = 0, 0
-						avpress = []
-						hourlytime = hourly["time"]
-						for idx, daydate in enumerate(hourlytime):  # collect all sealevel pressures and create averages per day
-							if todaydate.startswith(daydate[:10]):
-								hourpress += hourly["pressure_msl"][idx]
-								hourcount += 1
-							else:
-								todaydate = daydate[:10]
-								avpress.append(round(hourpress / hourcount))
-								hourpress, hourcount = 0, 0
-						avpress.append(round(hourpress / hourcount))
-						reduced["forecast"] = {}
-						for idx in range(7):  # collect forecast of today and next 6 days
-							reduced["forecast"][idx] = {}
-							pvdrCode = forecast["weathercode"][idx]
-							reduced["forecast"][idx]["ProviderCode"] = str(pvdrCode)
-							iconCode = self.convert2icon("OMW", pvdrCode)
-							if iconCode:
-								reduced["forecast"][idx]["yahooCode"] = iconCode.get("yahooCode", "NA")
-								reduced["forecast"][idx]["meteoCode"] = iconCode.get("meteoCode", ")")
-							reduced["forecast"][idx]["pressure"] = "%.0f" % avpress[idx]
-							reduced["forecast"][idx]["minTemp"] = "%.0f" % forecast["temperature_2m_min"][idx]
-							reduced["forecast"][idx]["maxTemp"] = "%.0f" % forecast["temperature_2m_max"][idx]
-							reduced["forecast"][idx]["maxFeelsLike"] = "%.0f" % forecast["apparent_temperature_max"][idx]
-							reduced["forecast"][idx]["minFeelsLike"] = "%.0f" % forecast["apparent_temperature_min"][idx]
-							reduced["forecast"][idx]["maxWindSpeed"] = "%.0f" % forecast["wind_speed_10m_max"][idx]
-							windDir = forecast["wind_direction_10m_dominant"][idx]
-							reduced["forecast"][idx]["domWindDir"] = "%.0f" % windDir
-							reduced["forecast"][idx]["domWindDirSign"] = self.directionsign(windDir)
-							reduced["forecast"][idx]["maxWindGusts"] = "%.0f" % forecast["wind_gusts_10m_max"][idx]
-							reduced["forecast"][idx]["maxUvIndex"] = "%.0f" % forecast["uv_index_max"][idx]
-							reduced["forecast"][idx]["maxVisibility"] = "%.0f" % round(max(hourly.get("visibility", [] + [0])) / 1000)
-							reduced["forecast"][idx]["precipitation"] = "%.0f" % forecast["precipitation_probability_max"][idx]
-							currdate = datetime.fromisoformat(forecast["time"][idx])
-							reduced["forecast"][idx]["dayText"] = currdate.strftime(daytextfmt)
-							reduced["forecast"][idx]["day"] = currdate.strftime("%A")
-							reduced["forecast"][idx]["shortDay"] = currdate.strftime("%a")
-							reduced["forecast"][idx]["date"] = currdate.strftime(datefmt)
-					except Exception as err:
-						self.error = "[%s] ERROR in module 'getreducedinfo#omw': general error. %s" % (wiglobals.MODULE_NAME, str(err))
-						return
-				else:
-					self.error = "[%s] ERROR in module 'getreducedinfo#omw': missing geodata." % wiglobals.MODULE_NAME
-
-			elif self.parser and self.mode == "owm":  # OpenWeatherMap is DEPRECATED
-				if self.geodata:
-					try:
-						main = self.info["main"]
-						reduced["source"] = "OpenWeatherMap"  # collect current weather data
-						location = self.geodata[0].split(", ")
-						reduced["name"] = location[0].split(", ")[0]
-						reduced["longitude"] = str(self.info["city"]["coord"]["lon"])
-						reduced["latitude"] = str(self.info["city"]["coord"]["lat"])
-						reduced["pressunit"] = "mbar"
-						reduced["tempunit"] = "°F" if self.units == "imperial" else "°C"
-						reduced["windunit"] = "mph" if self.units == "imperial" else "km/h"
-						reduced["precunit"] = "%"
-						reduced["visibiliyunit"] = "miles" if self.units == "imperial" else "km"
-						reduced["current"] = {}
-						now = datetime.now()
-						reduced["current"]["observationPoint"] = self.createFullname(location)
-						currdate = datetime.fromtimestamp(self.info["dt"])
-						reduced["current"]["observationTime"] = currdate.isoformat()
-						sunrise = datetime.fromtimestamp(self.info["city"]["sunrise"])
-						sunset = datetime.fromtimestamp(self.info["city"]["sunset"])
-						reduced["current"]["sunrise"] = sunrise.isoformat()
-						reduced["current"]["sunset"] = sunset.isoformat()
-						reduced["current"]["isNight"] = now < sunrise or now > sunset
-						pvdrCode = self.info["weather"][0]["id"]
-						reduced["current"]["ProviderCode"] = str(pvdrCode)
-						iconCode = self.convert2icon("OWM", pvdrCode)
-						if iconCode:
-							reduced["current"]["yahooCode"] = iconCode.get("yahooCode", "NA")
-							reduced["current"]["meteoCode"] = iconCode.get("meteoCode", ")")
-						reduced["current"]["pressure"] = "%.0f" % main["pressure"]
-						reduced["current"]["temp"] = "%.0f" % main["temp"]
-						reduced["current"]["feelsLike"] = "%.0f" % main["feels_like"]
-						reduced["current"]["humidity"] = "%.0f" % main["humidity"]
-						reduced["current"]["windSpeed"] = "%.0f" % (self.info["wind"]["speed"] * 3.6)
-						windDir = self.info["wind"]["deg"]
-						reduced["current"]["windDir"] = str(windDir)
-						reduced["current"]["windDirSign"] = self.directionsign(int(windDir))
-						reduced["current"]["windGusts"] = "%.0f" % self.info["list"][0]["wind"]["gust"]
-						reduced["current"]["visibility"] = "%.0f" % round(self.info["visibility"] / 1000)
-						reduced["current"]["dayText"] = currdate.strftime(daytextfmt)
-						reduced["current"]["day"] = currdate.strftime("%A")
-						reduced["current"]["shortDay"] = currdate.strftime("%a")
-						reduced["current"]["date"] = currdate.strftime(datefmt)
-						reduced["current"]["text"] = self.info["weather"][0]["description"]
-						# inits for today
-						hourpress, hourcount = 0, 0
-						tmin, tmax, fmin, fmax, wmax, gmax, vmax = 88, -88, 88, -88, -88, -88, -88
-						yahoocode, meteocode, text = None, None, None
-						prec, wdir = [], []
-						idx = 0
-						reduced["forecast"] = {}
-						for index, forecast in enumerate(self.info.get("list", [])):  # collect forecast of today and next 5 days
-							main = forecast.get("main", {})
-							if not index:
-								reduced["current"]["pressure"] = f"{round(main.get("pressure", 0))}"  # catch the missing data for current weather
-								reduced["current"]["minTemp"] = f"{round(main.get("temp_min", 0))}"
-								reduced["current"]["maxTemp"] = f"{round(main.get("temp_max", 0))}"
-								reduced["current"]["precipitation"] = f"{round(forecast.get("pop", 0) * 100)}"
-							hourpress += main.get("pressure", 0)
-							hourcount += 1
-							tmin = min(tmin, main.get("temp_min", 0))
-							tmax = max(tmax, main.get("temp_max", 0))
-							fmin = min(fmin, main.get("feels_like", 0))
-							fmax = max(fmax, main.get("feels_like", 0))
-							wmax = max(wmax, main.get("speed", 0))
-							gmax = max(gmax, main.get("gust", 0))
-							vmax = max(vmax, forecast.get("visibility", 0) / 1000)
-							wdir.append(forecast["wind"]["deg"])
-							prec.append(forecast["pop"])
-							dt_text = forecast["dt_txt"]
-							if "15:00:00" in dt_text:  # get weather icon as a representative icon for current day
-								pvdrCode = forecast.get("weather", [])[0].get("id", "NA")
-								iconCode = self.convert2icon("OWM", pvdrCode)
-								if iconCode:
-									yahoocode = iconCode.get("yahooCode", "NA")
-									meteocode = iconCode.get("meteoCode", ")")
-								text = forecast["weather"][0]["description"]
-							if "18:00:00" in dt_text and not yahoocode:  # in case we call the forecast late today: get current weather icon
-								pvdrCode = forecast["weather"][0]["id"]
-								iconCode = self.convert2icon("OWM", pvdrCode)
-								if iconCode:
-									yahoocode = iconCode.get("yahooCode", "NA")
-									meteocode = iconCode.get("meteoCode", ")")
-								text = text if text else forecast.get("weather", [])[0].get("description", "")
-							if "21:00:00" in dt_text:  # last available data before daychange
-								reduced["forecast"][idx] = {}
-								if not yahoocode:
-									pvdrCode = forecast["weather"][0]["id"]
-									reduced["forecast"][idx]["ProviderCode"] = str(pvdrCode)
-									iconCode = self.convert2icon("OWM", pvdrCode)
-									if iconCode:
-										yahoocode = iconCode.get("yahooCode", "NA")
-										meteocode = iconCode.get("meteoCode", ")")
-								reduced["forecast"][idx]["yahooCode"] = yahoocode
-								reduced["forecast"][idx]["meteoCode"] = meteocode
-								reduced["forecast"][idx]["pressure"] = "%.0f" % round(hourpress / hourcount)
-								reduced["forecast"][idx]["minTemp"] = "%.0f" % tmin
-								reduced["forecast"][idx]["maxTemp"] = "%.0f" % tmax
-								reduced["forecast"][idx]["maxFeelsLike"] = "%.0f" % fmin
-								reduced["forecast"][idx]["minFeelsLike"] = "%.0f" % fmax
-								reduced["forecast"][idx]["maxWindSpeed"] = "%.0f" % wmax
-								wdom = round(sum(wdir) / len(wdir)) if wdir else 0
-								reduced["forecast"][idx]["domWindDir"] = "%.0f" % wdom
-								reduced["forecast"][idx]["domWindDirSign"] = self.directionsign(wdom)
-								reduced["forecast"][idx]["maxWindGusts"] = "%.0f" % gmax
-								reduced["forecast"][idx]["maxVisibility"] = "%.0f" % vmax
-								reduced["forecast"][idx]["precipitation"] = "%.0f" % (sum(prec) / len(prec) * 100) if len(prec) > 0 else ""
-								reduced["forecast"][idx]["dayText"] = currdate.strftime(daytextfmt)
-								reduced["forecast"][idx]["day"] = currdate.strftime("%A")
-								reduced["forecast"][idx]["shortDay"] = currdate.strftime("%a")
-								reduced["forecast"][idx]["date"] = currdate.strftime(datefmt)
-								reduced["forecast"][idx]["text"] = text
-								# inits for next day
-								hourpress, hourcount = 0, 0
-								tmin, tmax, fmin, fmax, wmax, gmax, vmax = 88, -88, 88, -88, -88, -88, -88
-								yahoocode, meteocode, text = None, None, None
-								prec, wdir = [], []
-								idx += 1
-								currdate = currdate + timedelta(1)
-							if idx == 5 and "21:00:00" in forecast["dt_txt"]:  # in case day #5 is missing: create a copy of day 4 (=fake), in case day #5 is incomplete: use what we have
-								reduced["forecast"][idx] = {}
-								pvdrCode = forecast["weather"][0]["id"]
-								reduced["forecast"][idx]["ProviderCode"] = str(pvdrCode)
-								reduced["forecast"][idx]["yahooCode"] = yahoocode if yahoocode else reduced["forecast"][idx - 1]["yahooCode"]
-								reduced["forecast"][idx]["meteoCode"] = meteocode if meteocode else reduced["forecast"][idx - 1]["meteoCode"]
-								reduced["forecast"][idx]["pressure"] = reduced["forecast"][idx - 1]["pressure"]
-								reduced["forecast"][idx]["minTemp"] = "%.0f" % tmin if tmin != 88 else reduced["forecast"][idx - 1]["minTemp"]
-								reduced["forecast"][idx]["maxTemp"] = "%.0f" % tmax if tmax != - 88 else reduced["forecast"][idx - 1]["maxTemp"]
-								reduced["forecast"][idx]["maxFeelsLike"] = "%.0f" % fmin if fmin != 88 else reduced["forecast"][idx - 1]["minFeelsLike"]
-								reduced["forecast"][idx]["minFeelsLike"] = "%.0f" % fmax if fmax != - 88 else reduced["forecast"][idx - 1]["maxFeelsLike"]
-								reduced["forecast"][idx]["maxWindSpeed"] = "%.0f" % wmax if wmax != - 88 else reduced["forecast"][idx - 1]["maxWindSpeed"]
-								wdom = round(sum(wdir) / len(wdir)) if wdir else 0
-								reduced["forecast"][idx]["domWindDir"] = "%.0f" % wdom
-								reduced["forecast"][idx]["domWindDirSign"] = self.directionsign(wdom)
-								reduced["forecast"][idx]["maxWindGusts"] = "%.0f" % gmax if gmax != - 88 else reduced["forecast"][idx - 1]["maxWindGusts"]
-								reduced["forecast"][idx]["maxVisibility"] = "%.0f" % vmax if vmax != - 88 else reduced["forecast"][idx - 1]["maxVisibility"]
-								reduced["forecast"][idx]["precipitation"] = "%.0f" % (sum(prec) / len(prec) * 100) if len(prec) > 0 else ""
-								nextdate = datetime.strptime(reduced["forecast"][idx - 1]["date"], datefmt) + timedelta(1)
-								reduced["forecast"][idx]["dayText"] = currdate.strftime(daytextfmt)
-								reduced["forecast"][idx]["day"] = nextdate.strftime("%A")
-								reduced["forecast"][idx]["shortDay"] = nextdate.strftime("%a")
-								reduced["forecast"][idx]["date"] = nextdate.strftime(datefmt)
-								reduced["forecast"][idx]["text"] = text if text else reduced["forecast"][idx - 1]["text"]
-					except Exception as err:
-						self.error = "[%s] ERROR in module 'getreducedinfo#owm': general error. %s" % (wiglobals.MODULE_NAME, str(err))
-						return
-				else:
-					self.error = "[%s] ERROR in module 'getreducedinfo#owm': missing geodata." % wiglobals.MODULE_NAME
+		cells = {}  # (lon, lat): index in the batch, locations in the same grid cell are fetched once
+		for req in missing:
+			cells.setdefault(self.coordinates(req), len(cells))
+		batch = WIrequest("omw", missing[0].geodata, missing[0].units, missing[0].scheme)
+		jsonData = self.apiserver("https://api.open-meteo.com/v1/forecast", self.omwparams(list(cells), missing[0].units), request=batch)
+		results = jsonData if isinstance(jsonData, list) else [jsonData]
+		for req in missing:
+			idx = cells[self.coordinates(req)]
+			if batch.error or idx >= len(results):
+				req.error = batch.error or "[%s] ERROR in module 'omwbatch': no data found." % wiglobals.MODULE_NAME
+				continue
+			req.info = results[idx]
+			cache = self.cachefor(req)
+			if cache:
+				cache.put(self.cachekey("forecast", req), req.info)
+
+	def stop(self):  # running requests are finished without calling back
+		with self.lock:
+			self.error = None
+			self.callback = None
+			for req in self.pending:
+				req.callback = None
+
+	def apiserver(self, link, params=None, cachekey=None, request=None):
+		from requests import exceptions
+		req = self if request is None else request
+		req.error = None
+		jsonData = {}
+		cache = self.cachefor(request)
+		if link:
+			if cache and cachekey:
+				jsonData = cache.get(cachekey)
+				self.metrics.count("cache", req.mode, "miss" if jsonData is None else "hit")
+				if jsonData is not None:
+					return jsonData
+				jsonData = {}
+			try:
+				session = self.session or WIsession.shared()
+				stats = {}
+				with self.metrics.stage("fetch", req.mode, self.metrics.host(link)) as info:
+					jsonData = session.getjson(link, headers=self.headers, params=params, timeout=(3.05, 6), select=self.selector(request), stats=stats)
+					info.update(stats)
+				if "parse" in stats:
+					self.metrics.record("parse", req.mode, stats["parse"], bytes=stats["bytes"])
+				if cache and cachekey and jsonData:
+					cache.put(cachekey, jsonData)
+			except exceptions.RequestException as err:
+				req.error = "[%s] ERROR in module 'apiserver': '%s" % (wiglobals.MODULE_NAME, str(err))
+		else:
+			req.error = "[%s] ERROR in module 'apiserver': missing link." % wiglobals.MODULE_NAME
+		return jsonData
+
+	def msnparser(self, request=None):
+		return self.parse(request, "MSN")
+
+	def omwparser(self, request=None):
+		return self.parse(request, "OMW")
+
+	def owmparser(self, request=None):  # OpenWeatherMap is DEPRECATED
+		return self.parse(request, "OWM")
+
+	def parse(self, request, source):  # request: WIrequest of start, None = use the attributes of this instance
+		req = self if request is None else request
+		req.error, req.info, req.result, req.dataReady = None, None, None, False
+		module = "%sparser" % source.lower()
+		if source == "OWM" and not self.apikey:
+			req.error = "[%s] ERROR in module '%s': API-key is missing!" % (wiglobals.MODULE_NAME, module)
+		elif not req.geodata:
+			req.error = "[%s] ERROR in module '%s': missing geodata." % (wiglobals.MODULE_NAME, module)
+		else:
+			flight, leader = WIflight.board(self.flightkey(req))
+			if not leader:
+				flight.done.wait()
+				return self.deliver(req, flight)
+			if req.callback:
+				print("[%s] accessing %s for weatherdata..." % (wiglobals.MODULE_NAME, source))
+			try:
+				self.fetchinfo(req)
+			except Exception as err:  # e.g. ValueError of a malformed answer: the flight has to land anyway, with the error for all waiting requests
+				req.info, req.error = None, "[%s] ERROR in module '%s': %s" % (wiglobals.MODULE_NAME, module, str(err) or err.__class__.__name__)
+			waiters = flight.land(req.info, req.error, req.mode)
+			if req.callback and req.info and req.error is None:
+				print("[%s] %s successfully accessed..." % (wiglobals.MODULE_NAME, source))
+			result = self.deliver(req, flight)
+			for instance, waiter in waiters:  # fan out to the callbacks of all identical requests
+				instance.deliver(waiter, flight)
+			return result
+		return self.finish(req)
 
+	def flightkey(self, req):
+		return (req.mode, self.coordinates(req) if self.grid else tuple(req.geodata), req.units, req.scheme, self.apikey if req.mode == "owm" or self.fallback else None, self.selector(req) is not None, self.fallback)
+
+	def deliver(self, req, flight):
+		req.info, req.error, req.mode = flight.info, flight.error, flight.mode
+		if req.info and req.error is None:
+			req.dataReady = True
+			if req.reduced:
+				req.result, req.error = flight.reduce(self, req)
 			else:
-				self.error = "[%s] ERROR in module 'getreducedinfo': unknown source." % wiglobals.MODULE_NAME
+				req.result = req.info
+		return self.finish(req)
+
+	def finish(self, req):  # publish the request as the latest state of this instance and deliver it
+		with self.lock:
+			self.pending.discard(req)
+			callback = req.callback
+			if req is not self:
+				self.info, self.error, self.geodata, self.units, self.scheme, self.reduced, self.dataReady = req.info, req.error, req.geodata, req.units, req.scheme, req.reduced, req.dataReady
+				self.infomode = req.mode
+				if self.revalidate and req.result and not req.error:
+					if self.lastgood is None:
+						self.lastgood = OrderedDict()
+					key = (tuple(req.geodata), req.units, req.scheme, req.reduced)
+					self.lastgood[key] = (time(), req.result)
+					self.lastgood.move_to_end(key)
+					while len(self.lastgood) > self.MAXLASTGOOD:
+						self.lastgood.popitem(last=False)
+		if callback:
+			callback(None if req.error else req.result, req.error)
+		return None if req.error else req.result
+
+	def getreducedinfo(self, request=None):  # request: WIrequest of start/start_many/fetch, None = latest finished request of this instance
+		if request is None:
+			req = self.snapshot()
+			reduced = self.getreducedinfo(req)
+			self.error = req.error
+			return reduced
+		req = request
+		key = (req.mode, req.units, req.scheme, tuple(req.geodata), self.parser is not None)
+		with self.lock:
+			memo = self.memo
+			if memo and memo[0] is req.info and memo[1] == key:  # same fetch, same settings: computed once
+				self.reducedhits += 1
+				req.error = memo[3]
+				self.metrics.count("memo", req.mode, "hit")
+				return memo[2]
+		with self.metrics.stage("reduce", req.mode) as info:
+			reduced = self.reduceinfo(req)
+			info["error"] = req.error
+		with self.lock:
+			self.reducedmisses += 1
+			if req.info:
+				self.memo = (req.info, key, reduced, req.error)
+		return reduced
+
+	def reduceinfo(self, req):
+		req.error = None
+		reduced = {}
+		if req.info:
+			context = {"msn": self.msncontext, "omw": self.omwcontext, "owm": self.owmcontext}.get(req.mode) if self.parser else None
+			if context is None:
+				req.error = "[%s] ERROR in module 'getreducedinfo': unknown source." % wiglobals.MODULE_NAME
+				return
+			if not req.geodata:
+				req.error = "[%s] ERROR in module 'getreducedinfo#%s': missing geodata." % (wiglobals.MODULE_NAME, req.mode)
+				return reduced
+			try:
+				reduced = WIreducer.reduce(req.mode, *context(req))
+			except Exception as err:
+				req.error = "[%s] ERROR in module 'getreducedinfo#%s': general error. %s" % (wiglobals.MODULE_NAME, req.mode, str(err))
 				return
 		return reduced
 
-	def writereducedjson(self, filename):
+	def msncontext(self, req):  # returns the contexts (header, current, {day: forecast}) for the reducer tables of MSN
+		weather = req.info["responses"][0]["weather"][0]
+		current = weather["current"]
+		forecast = weather["forecast"]["days"]
+		location = req.geodata[0].split(", ")
+		tempunit = req.info["units"]["temperature"].strip("\u200e")
+		header = {"name": location[0].split(", ")[0], "source": req.info["responses"][0]["source"], "units": req.info["units"], "tempunit": tempunit}
+		sunrise = datetime.fromisoformat(forecast[0]["almanac"]["sunrise"]).replace(tzinfo=None)
+		sunset = datetime.fromisoformat(forecast[0]["almanac"]["sunset"]).replace(tzinfo=None)
+		now = datetime.now()
+		hourly = forecast[0]["hourly"]
+		pvdrCode = hourly[0]["symbol"] if hourly else current["symbol"]
+		iconCode = self.iconcodes("msn", pvdrCode)
+		currdate = datetime.fromisoformat(current["created"]).replace(tzinfo=None)
+		dates = WIdates.forscheme(req.scheme)
+		today = currdate.toordinal()
+		context = {"current": current, "today": forecast[0], "fullname": self.createFullname(location), "currdate": currdate, "dates": dates.day(today), "sunrise": sunrise, "sunset": sunset,
+				"moonrise": datetime.fromisoformat(forecast[0]["almanac"]["moonrise"]).replace(tzinfo=None), "moonset": datetime.fromisoformat(forecast[0]["almanac"]["moonset"]).replace(tzinfo=None),
+				"isNight": now < sunrise or now > sunset, "code": pvdrCode, "yahooCode": iconCode.get("yahooCode", "NA") if iconCode else "NA", "meteoCode": iconCode.get("meteoCode", ")") if iconCode else ")",
+				"text": hourly[0]["pvdrCap"] if hourly else current["capAbbr"], "raintext": weather["nowcasting"]["shortSummary"]}
+		days = {}
+		icons = self.convert_many("msn", [day["daily"]["symbol"] for day in forecast[:7]])
+		for idx in range(7):  # collect forecast of today and next 6 days
+			day = forecast[idx]
+			iconCodes = icons[idx]
+			umbrellaIndex = weather["lifeDaily"]["days"][0]["umbrellaIndex"]
+			days[idx] = {"day": day, "dates": dates.day(today + idx), "yahooCode": iconCodes.get("yahooCode", "NA") if iconCodes else "NA", "meteoCode": iconCodes.get("meteoCode", ")") if iconCodes else ")",
+						"daySummary1": day["daily"]["day"]["summaries"][1].strip().replace("°.", " %s." % tempunit), "nightSummary1": day["daily"]["night"]["summaries"][1].strip().replace("°.", " %s." % tempunit),
+						"umbrellaIndex": umbrellaIndex["longSummary2"] if "longSummary2" in umbrellaIndex else umbrellaIndex["summary"]}
+		return header, context, days
+
+	def omwcontext(self, req):  # returns the contexts (header, current, {day: forecast}) for the reducer tables of Open-Meteo
+		hourly = req.info["hourly"]
+		forecast = req.info["daily"]
+		location = req.geodata[0].split(", ")
+		header = {"info": req.info, "name": location[0].split(", ")[0], "visunit": "miles" if req.units == "imperial" else "km"}
+		isotime = datetime.fromisoformat(req.info["current"]["time"]).astimezone()
+		timestr = isotime.replace(minute=0, second=0, microsecond=0).isoformat()[:16]
+		columns = WIcolumns(hourly)
+		dates = WIdates.forscheme(req.scheme)
+		idx = columns.index(timestr)
+		context = None
+		if idx is not None:  # collect current
+			sunrise = datetime.fromisoformat(forecast["sunrise"][0])
+			sunset = datetime.fromisoformat(forecast["sunset"][0])
+			now = datetime.now()
+			iconCode = self.iconcodes("omw", hourly["weathercode"][idx])
+			context = {"#": idx, "info": req.info, "fullname": self.createFullname(location), "observationTime": isotime.isoformat()[:19], "sunrise": sunrise, "sunset": sunset,
+					"isNight": now < sunrise or now > sunset, "yahooCode": iconCode.get("yahooCode", "NA") if iconCode else WIreducer.SKIP,
+					"meteoCode": iconCode.get("meteoCode", ")") if iconCode else WIreducer.SKIP, "dates": dates.day(hourly["time"][idx])}
+		avpress = [round(pressure) for pressure in columns.daily("pressure_msl", "mean")]  # sealevel pressure averages per day
+		maxvisibility = max(columns.column("visibility", [0]))
+		days = {}
+		icons = self.convert_many("omw", forecast["weathercode"][:7])
+		for idx in range(7):  # collect forecast of today and next 6 days
+			iconCode = icons[idx]
+			days[idx] = {"#": idx, "info": req.info, "pressure": avpress[idx], "maxvisibility": maxvisibility, "dates": dates.day(forecast["time"][idx]),
+						"yahooCode": iconCode.get("yahooCode", "NA") if iconCode else WIreducer.SKIP, "meteoCode": iconCode.get("meteoCode", ")") if iconCode else WIreducer.SKIP}
+		return header, context, days
+
+	def owmcontext(self, req):  # OpenWeatherMap is DEPRECATED
+		imperial = req.units == "imperial"
+		location = req.geodata[0].split(", ")
+		header = {"info": req.info, "name": location[0].split(", ")[0], "tempunit": "°F" if imperial else "°C", "windunit": "mph" if imperial else "km/h", "visunit": "miles" if imperial else "km"}
+		now = datetime.now()
+		currdate = datetime.fromtimestamp(req.info["dt"])
+		dates = WIdates.forscheme(req.scheme)
+		sunrise = datetime.fromtimestamp(req.info["city"]["sunrise"])
+		sunset = datetime.fromtimestamp(req.info["city"]["sunset"])
+		iconCode = self.iconcodes("owm", req.info["weather"][0]["id"])
+		forecasts = req.info.get("list", [])
+		first = forecasts[0] if forecasts else {}
+		main = first.get("main", {})
+		skip = WIreducer.SKIP
+		context = {"info": req.info, "fullname": self.createFullname(location), "currdate": currdate, "dates": dates.day(currdate), "sunrise": sunrise, "sunset": sunset,
+				"isNight": now < sunrise or now > sunset, "yahooCode": iconCode.get("yahooCode", "NA") if iconCode else skip, "meteoCode": iconCode.get("meteoCode", ")") if iconCode else skip,
+				"pressure": "%.0f" % req.info["main"]["pressure"], "mintemp": main.get("temp_min", 0) if forecasts else skip, "maxtemp": main.get("temp_max", 0) if forecasts else skip,
+				"precipitation": str(round(first.get("pop", 0) * 100)) if forecasts else skip}
+		if forecasts:
+			context["pressure"] = str(round(main.get("pressure", 0)))  # catch the missing data for current weather
+		# inits for today
+		hourpress, hourcount = 0, 0
+		tmin, tmax, fmin, fmax, wmax, gmax, vmax = 88, -88, 88, -88, -88, -88, -88
+		yahoocode, meteocode, text = None, None, None
+		prec, wdir = [], []
+		idx = 0
+		days = {}
+		for forecast in forecasts:  # collect forecast of today and next 5 days
+			main = forecast.get("main", {})
+			hourpress += main.get("pressure", 0)
+			hourcount += 1
+			tmin = min(tmin, main.get("temp_min", 0))
+			tmax = max(tmax, main.get("temp_max", 0))
+			fmin = min(fmin, main.get("feels_like", 0))
+			fmax = max(fmax, main.get("feels_like", 0))
+			wmax = max(wmax, main.get("speed", 0))
+			gmax = max(gmax, main.get("gust", 0))
+			vmax = max(vmax, forecast.get("visibility", 0) / 1000)
+			wdir.append(forecast["wind"]["deg"])
+			prec.append(forecast["pop"])
+			dt_text = forecast["dt_txt"]
+			if "15:00:00" in dt_text:  # get weather icon as a representative icon for current day
+				pvdrCode = forecast.get("weather", [])[0].get("id", "NA")
+				iconCode = self.iconcodes("owm", pvdrCode)
+				if iconCode:
+					yahoocode = iconCode.get("yahooCode", "NA")
+					meteocode = iconCode.get("meteoCode", ")")
+				text = forecast["weather"][0]["description"]
+			if "18:00:00" in dt_text and not yahoocode:  # in case we call the forecast late today: get current weather icon
+				pvdrCode = forecast["weather"][0]["id"]
+				iconCode = self.iconcodes("owm", pvdrCode)
+				if iconCode:
+					yahoocode = iconCode.get("yahooCode", "NA")
+					meteocode = iconCode.get("meteoCode", ")")
+				text = text if text else forecast.get("weather", [])[0].get("description", "")
+			if "21:00:00" in dt_text:  # last available data before daychange
+				code = skip
+				if not yahoocode:
+					pvdrCode = forecast["weather"][0]["id"]
+					code = str(pvdrCode)
+					iconCode = self.iconcodes("owm", pvdrCode)
+					if iconCode:
+						yahoocode = iconCode.get("yahooCode", "NA")
+						meteocode = iconCode.get("meteoCode", ")")
+				days[idx] = {"code": code, "yahooCode": yahoocode, "meteoCode": meteocode, "pressure": round(hourpress / hourcount), "tmin": tmin, "tmax": tmax, "fmin": fmin, "fmax": fmax,
+							"wmax": wmax, "wdom": round(sum(wdir) / len(wdir)) if wdir else 0, "gmax": gmax, "vmax": vmax, "precipitation": "%.0f" % (sum(prec) / len(prec) * 100) if len(prec) > 0 else "",
+							"dates": dates.day(currdate), "text": text}
+				# inits for next day
+				hourpress, hourcount = 0, 0
+				tmin, tmax, fmin, fmax, wmax, gmax, vmax = 88, -88, 88, -88, -88, -88, -88
+				yahoocode, meteocode, text = None, None, None
+				prec, wdir = [], []
+				idx += 1
+				currdate = currdate + timedelta(1)
+			if idx == 5 and "21:00:00" in forecast["dt_txt"]:  # in case day #5 is missing: create a copy of day 4 (=fake), in case day #5 is incomplete: use what we have
+				previous = days[idx - 1]
+				days[idx] = {"code": str(forecast["weather"][0]["id"]), "yahooCode": yahoocode if yahoocode else previous["yahooCode"], "meteoCode": meteocode if meteocode else previous["meteoCode"],
+							"pressure": previous["pressure"], "tmin": tmin if tmin != 88 else previous["tmin"], "tmax": tmax if tmax != -88 else previous["tmax"],
+							"fmin": fmin if fmin != 88 else previous["fmax"], "fmax": fmax if fmax != -88 else previous["fmin"], "wmax": wmax if wmax != -88 else previous["wmax"],
+							"wdom": round(sum(wdir) / len(wdir)) if wdir else 0, "gmax": gmax if gmax != -88 else previous["gmax"], "vmax": vmax if vmax != -88 else previous["vmax"],
+							"precipitation": "%.0f" % (sum(prec) / len(prec) * 100) if len(prec) > 0 else "", "dates": dates.day(currdate),
+							"text": text if text else previous["text"]}
+		return header, context, days
+
+	def writefile(self, filename, content, skip=0):  # atomic write of bytes, skipped if the content (from byte 'skip' on) equals the file: returns True if written
+		digest = sha1(content[skip:]).digest()
+		previous = self.written.get(filename)
+		if previous is None:  # first write of this instance: compare with the file left by a former run
+			try:
+				with open(filename, "rb") as f:
+					previous = sha1(f.read()[skip:]).digest()
+			except OSError:
+				pass
+		mode = self.infomode or self.mode
+		if previous == digest:
+			self.written[filename] = digest
+			self.metrics.count("write", mode, "unchanged")
+			return False
+		with self.metrics.stage("write", mode) as info:
+			atomicwrite(filename, content)
+			info["bytes"] = len(content)
+		self.written[filename] = digest  # only once written: after a failed write the same content is tried again
+		self.metrics.count("write", mode, "written")
+		return True
+
+	def writereducedjson(self, filename, diff=None):  # diff = filename: changes are written there only (see 'jsondiff'), 'filename' is the full base, rewritten every DIFFBASE changes
 		self.error = None
 		reduced = self.getreducedinfo()
 		if self.error:
@@ -784,21 +2236,109 @@ class Weatherinfo:
 		if reduced is None:
 			self.error = "[%s] ERROR in module 'writereducedjson': no data found." % wiglobals.MODULE_NAME
 			return
-		with open(filename, "w") as f:
-			dump(reduced, f)
+		content = dumps(reduced).encode("utf-8")
+		try:
+			if diff:
+				self.writediff(filename, diff, content)
+			else:
+				self.writefile(filename, content)
+		except OSError as err:
+			self.error = "[%s] ERROR in module 'writereducedjson': %s" % (wiglobals.MODULE_NAME, str(err))
+			return
 		return filename
 
+	def writediff(self, filename, diff, content):  # readers take 'filename' and apply the changes of 'diff' if its "base" is the sha1 of 'filename' (see 'jsonmerge')
+		digest = sha1(content).hexdigest()
+		state = self.written.get((filename, diff))  # [base content, sha1 of the base, changes since the base, sha1 of the latest content]
+		if state is None:  # first write of this instance: the file left by a former run is the base
+			try:
+				with open(filename, "rb") as f:
+					base = f.read()
+				loads(base)
+				state = [base, sha1(base).hexdigest(), 0, sha1(base).hexdigest()]
+			except (OSError, ValueError):
+				pass
+		mode = self.infomode or self.mode
+		if state and state[3] == digest:
+			self.written[(filename, diff)] = state
+			self.metrics.count("write", mode, "unchanged")
+			return
+		if state is None or state[2] >= self.DIFFBASE:  # new full base, a former diff does not match it anymore
+			self.writefile(filename, content)
+			self.written[(filename, diff)] = [content, digest, 0, digest]
+			return
+		changes, removed = jsondiff(loads(state[0]), loads(content))  # both as read back from JSON (keys are strings)
+		changes = dumps({"base": state[1], "digest": digest, "changes": changes, "removed": removed}).encode("utf-8")
+		with self.metrics.stage("write", mode) as info:
+			atomicwrite(diff, changes)
+			info["bytes"] = len(changes)
+		self.metrics.count("write", mode, "diff")
+		state[2], state[3] = state[2] + 1, digest
+		self.written[(filename, diff)] = state
+
 	def writejson(self, filename):
 		self.error = None
 		if self.info:
 			try:
-				with open(filename, "w") as f:
-					dump(self.info, f)
+				self.writefile(filename, dumps(self.info).encode("utf-8"))
 			except Exception as err:
 				self.error = "[%s] ERROR in module 'writejson': %s" % (wiglobals.MODULE_NAME, str(err))
 		else:
 			self.error = "[%s] ERROR in module 'writejson': no data found." % wiglobals.MODULE_NAME
 
+	def writesnapshot(self, filename, reduced=False):  # binary alternative of 'writejson'/'writereducedjson', read by WIsnapshot.open or WIsnapshot.load
+		self.error = None
+		data = self.getreducedinfo() if reduced else self.info
+		if self.error:
+			return
+		if not data:
+			self.error = "[%s] ERROR in module 'writesnapshot': no data found." % wiglobals.MODULE_NAME
+			return
+		try:
+			self.writefile(filename, WIsnapshot.dumps(data, "reduced" if reduced else "full"), WIsnapshot.HEADER.size)  # the header holds the time of writing
+		except (OSError, TypeError) as err:
+			self.error = "[%s] ERROR in module 'writesnapshot': %s" % (wiglobals.MODULE_NAME, str(err))
+			return
+		return filename
+
+	def writelocations(self, filename, geolist, units="metric", scheme="de-de", snapshot=False, workers=8):  # reduced DICTs of many places in one file {cityname: reduced DICT}, geolist items: geodata or cityname (first search result)
+		self.error = None
+		if not geolist:
+			self.error = "[%s] ERROR in module 'writelocations': missing geolist." % wiglobals.MODULE_NAME
+			return
+		errors = []
+		names = [item for item in geolist if isinstance(item, str)]
+		found = {}
+		if names:  # searches run concurrently, each with its own error context
+			from concurrent.futures import ThreadPoolExecutor
+			searches = {name: WIrequest(self.mode, None, units, scheme, True) for name in set(names)}
+			with ThreadPoolExecutor(max_workers=max(1, min(workers, len(searches)))) as executor:
+				results = dict(zip(searches, executor.map(lambda name: self.getCitylist(name, scheme, 1, request=searches[name]), searches)))
+			for name, citylist in results.items():
+				if citylist:
+					found[name] = citylist[0]
+				else:
+					errors.append(searches[name].error or "[%s] ERROR in module 'writelocations': no city '%s' found." % (wiglobals.MODULE_NAME, name))
+		geolist = [found.get(item) if isinstance(item, str) else item for item in geolist]
+		locations = {}
+		for geodata, reduced, error in self.start_many([geodata for geodata in geolist if geodata], units, scheme, True, workers):
+			if error or not reduced:
+				errors.append(error or "[%s] ERROR in module 'writelocations': no data found for '%s'." % (wiglobals.MODULE_NAME, geodata[0]))
+				continue
+			name = geodata[0]
+			if name in locations:  # same name for different places
+				name = "%s [lon=%s, lat=%s]" % tuple(geodata[:3])
+			locations[name] = reduced
+		self.error = "\n".join(errors) or None
+		if not locations:
+			return
+		try:
+			self.writefile(filename, WIsnapshot.dumps(locations, "reduced"), WIsnapshot.HEADER.size) if snapshot else self.writefile(filename, dumps(locations).encode("utf-8"))
+		except (OSError, TypeError) as err:
+			self.error = "[%s] ERROR in module 'writelocations': %s" % (wiglobals.MODULE_NAME, str(err))
+			return
+		return filename
+
 	def getinfo(self):
 		self.error = None
 		if self.info is None:
@@ -871,6 +2411,95 @@ class Weatherinfo:
 		return self.dataReady
 
 
+class WIservice:  # shared Weatherinfo for many clients over HTTP: /citylist, /forecast and /reduced answer in JSON
+	def __init__(self, mode="msn", apikey=None, cache=True, geoindex=None):
+		cache = WIcache() if cache is True else cache
+		self.mode = mode
+		self.geoindex = (WIgeoindex.shared(geoindex) if isinstance(geoindex, str) else geoindex) or WIgeoindex()  # searches of all clients, in memory unless a file is given
+		self.instances = {source: Weatherinfo(source, apikey, cache=cache, geoindex=self.geoindex) for source in wiglobals.SOURCES if source != "owm" or apikey}
+		self.requests = 0
+
+	def handle(self, path, query):  # returns (HTTP status, JSON-able answer or text), query: {name: value}
+		self.requests += 1
+		try:  # errors in parameters are errors of the client, all later ones of the provider
+			count = int(query.get("count", 10))
+			lonlat = (float(query["lon"]), float(query["lat"])) if "lon" in query and "lat" in query else None
+			if count < 1:
+				raise ValueError("count must be at least 1")
+		except ValueError as err:
+			return 400, {"error": "[%s] ERROR in module 'WIservice': invalid parameter. %s" % (wiglobals.MODULE_NAME, str(err))}
+		if path == "/metrics":  # Prometheus
+			return 200, wimetrics.prometheus()
+		if path == "/metrics.json":
+			return 200, wimetrics.snapshot()
+		WI = self.instances.get(query.get("mode", self.mode).lower())
+		if WI is None:
+			return 400, {"error": "[%s] ERROR in module 'WIservice': mode '%s' is not available." % (wiglobals.MODULE_NAME, query.get("mode"))}
+		scheme = query.get("scheme", "de-de")
+		if path in ("/citylist", "/forecast", "/reduced") and not query.get("name") and not lonlat:
+			return 400, {"error": "[%s] ERROR in module 'WIservice': missing parameter 'name' (or 'lon' and 'lat')." % wiglobals.MODULE_NAME}
+		if path == "/citylist" and not query.get("name"):  # by lon/lat: the nearest known places
+			citylist = [place[:3] for place in self.geoindex.nearest(*lonlat, count=count)]
+			return (200, citylist) if citylist else (404, {"error": "[%s] ERROR in module 'WIservice': no known place near lon=%s, lat=%s." % ((wiglobals.MODULE_NAME,) + lonlat)})
+		if path == "/citylist":
+			req = WIrequest(WI.mode, None)
+			citylist = WI.getCitylist(query.get("name"), scheme, count, request=req)
+			if not citylist:  # [] = no city found, None = failure of the provider
+				return (404 if citylist == [] else 502), {"error": req.error or "[%s] ERROR in module 'WIservice': no city '%s' found." % (wiglobals.MODULE_NAME, query.get("name"))}
+			return 200, citylist
+		if path not in ("/forecast", "/reduced"):
+			return 404, {"error": "[%s] ERROR in module 'WIservice': unknown path '%s'. Valid paths: '/citylist', '/forecast', '/reduced'" % (wiglobals.MODULE_NAME, path)}
+		if lonlat:
+			geodata = (query.get("name") or "%s, %s" % (query["lon"], query["lat"]), lonlat[0], lonlat[1])
+		else:  # by cityname: the first search result
+			req = WIrequest(WI.mode, None)
+			citylist = WI.getCitylist(query.get("name"), scheme, request=req)
+			if not citylist:
+				return (404 if citylist == [] else 502), {"error": req.error or "[%s] ERROR in module 'WIservice': no city '%s' found." % (wiglobals.MODULE_NAME, query.get("name"))}
+			geodata = citylist[0]
+		req = WIrequest(WI.mode, geodata, query.get("units", "metric"), scheme, path == "/reduced")
+		req.error = WI.checkrequest(req, "WIservice")
+		if req.error:
+			return 400, {"error": req.error}
+		WI.parser(req)  # identical requests of several clients share one fetch (see WIflight)
+		return (502, {"error": req.error}) if req.error else (200, req.result)
+
+	def serve(self, address=":8080"):  # address: "[host]:port", runs until interrupted
+		from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+		from urllib.parse import parse_qsl, urlsplit
+		service = self
+
+		class WIhandler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"  # keep-alive
+
+			def log_message(self, format, *args):
+				pass
+
+			def do_GET(self):
+				parts = urlsplit(self.path)
+				try:
+					status, answer = service.handle(parts.path, dict(parse_qsl(parts.query)))
+				except Exception as err:  # parameters are checked by 'handle', so this is a failure of the provider (e.g. a malformed answer)
+					status, answer = 502, {"error": "[%s] ERROR in module 'WIservice': %s" % (wiglobals.MODULE_NAME, str(err) or err.__class__.__name__)}
+				text = isinstance(answer, str)
+				body = (answer if text else dumps(answer)).encode("utf-8")
+				self.send_response(status)
+				self.send_header("Content-Type", "text/plain; version=0.0.4" if text else "application/json")
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+		host, port = address.rsplit(":", 1) if ":" in address else ("", address)
+		server = ThreadingHTTPServer((host, int(port)), WIhandler)
+		server.daemon_threads = True
+		print("[%s] serving %s on %s:%s" % (wiglobals.MODULE_NAME, ", ".join(self.instances), host or "*", server.server_address[1]))
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
+		server.server_close()
+
+
 def main(argv):
 	mainfmt = "[__main__]"
 	cityname = ""
@@ -883,6 +2512,9 @@ def main(argv):
 	reduced = False
 	specialopt = None
 	control = False
+	serve = None
+	locations = None
+	binary = False
 	geodata = None
 	info = None
 	geodata = ("", 0, 0)
@@ -890,13 +2522,13 @@ def main(argv):
 	opts = None
 	args = None
 	try:
-		opts, args = getopt(argv, "hqm:a:j:r:x:s:u:i:c", ["quiet =", "mode=", "apikey=", "json =", "reduced =", "scheme =", "units =", "control ="])
+		opts, args = getopt(argv, "hqm:a:j:r:x:s:u:i:cl:b", ["quiet =", "mode=", "apikey=", "json =", "reduced =", "scheme =", "units =", "control =", "serve=", "locations=", "binary"])
 	except GetoptError:
 		print(helpstring)
 		exit(2)
-	for opt, arg in opts:
+	for opt, value in opts:
 		opt = opt.lower().strip()
-		arg = arg.lower().strip()
+		arg = value.lower().strip()
 		if opt == "-h":
 			print("Usage: python Weatherinfo.py [options...] <cityname>\n"
 			"-m, --mode <data>\t\tValid modes: 'omw', 'owm' or 'msn' {'msn' is default}\n"
@@ -906,6 +2538,10 @@ def main(argv):
 			"-s, --scheme <data>\t\tCountry scheme (not used by 'omw') {'de-de' is default}\n"
 			"-u, --units <data>\t\tValid units: 'imperial' or 'metric' {'metric' is default}\n"
 			"-c, --control\t\t\tShow iconcode-plaintexts and conversion rules\n"
+			"-l, --locations <data>\t\tSeveral cities separated by ';' or a geolist file (JSON [[name, lon, lat], ...] or one cityname per line),\n"
+			"\t\t\t\twritten together into the file of '-r' as {cityname: reduced infos}\n"
+			"-b, --binary\t\t\tWrite the file of '-r' as binary snapshot (see WIsnapshot)\n"
+			"--serve <[host]:port>\t\tRun as HTTP service: /citylist?name= (or ?lon=&lat=), /forecast and /reduced?lon=&lat=&name= (or ?name= only)\n"
 			"-q, --quiet\t\t\tPerform without text output and select first found city")
 			exit()
 		elif opt in ("-u", "--units:"):
@@ -934,6 +2570,34 @@ def main(argv):
 		elif opt in ("-q", "--quiet"):
 			quiet = True
 			specialopt = True
+		elif opt == "--serve":
+			serve = arg
+		elif opt in ("-l", "--locations"):
+			locations = value.strip()  # file names are case sensitive
+		elif opt in ("-b", "--binary"):
+			binary = True
+	if serve:
+		WIservice(mode, apikey).serve(serve)
+		exit()
+	if locations:
+		if not reduced:
+			print("ERROR: '--locations' needs the output file of '-r, --reduced'")
+			exit()
+		geolist = [name.strip() for name in locations.split(";") if name.strip()]
+		if isfile(locations):
+			with open(locations, "r") as f:
+				content = f.read()
+			try:
+				geolist = [tuple(item) if isinstance(item, list) else item for item in loads(content)]
+			except ValueError:
+				geolist = [line.strip() for line in content.splitlines() if line.strip()]
+		WI = Weatherinfo(mode, apikey)
+		filename = WI.writelocations(reduced, geolist, units, scheme, binary)
+		if WI.error:
+			print(WI.error.replace(mainfmt, "").strip())
+		if filename and not quiet:
+			print("File '%s' was successfully created." % filename)
+		exit()
 	for part in args:
 		cityname += "%s " % part
 	cityname = cityname.strip()